@@ -1,24 +1,33 @@
-import joblib
+import hashlib
+import io
+
 import streamlit as st
-import base64
 
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
+
+from gradepath import audit, metrics, warmup
+from gradepath.assets import background_css
+from gradepath.cache import cached_prediction, get_prediction_cache
+from gradepath.forest import CompiledModel
+from gradepath.registry import get_registry
+from gradepath.report import build_report, mailto_link
+# Page-specific modules (explain, whatif, batch, export) are imported where they are used
 
 
 st.set_page_config(page_title="Student Achievement Predictor", layout="wide")
 
+metrics.start_exporters()
+# No-op when served by gradepath.web, which warms up before taking traffic
+warmup.start_background()
+metrics.update_session_profiler(st.session_state, st.query_params.get("profile") == "1")
+
 
 def set_bg():
-    bg_image = '1 (2).png' 
-    with open(bg_image, "rb") as image_file:
-        encoded = base64.b64encode(image_file.read()).decode()
+    background = background_css('.stApp', static_serving=st.get_option("server.enableStaticServing"))
     st.markdown(f"""
         <style>
+        {background}
         .stApp {{
-            background: url('data:image/jpg;base64,{encoded}') center center/cover no-repeat !important;
             min-height: 100vh;
         }}
         .centered {{
@@ -121,145 +130,38 @@ def set_bg():
     """, unsafe_allow_html=True)
 
 
-def generate_recommendations(input_dict, prediction):
-    """Generate personalized recommendations based on student inputs and predicted grade"""
-    recommendations = []
-    
-    # Grade-based overall assessment
-    if prediction < 10:
-        grade_level = "At Risk"
-        grade_color = "#ef4444"
-    elif prediction < 14:
-        grade_level = "Needs Improvement"
-        grade_color = "#f59e0b"
-    elif prediction < 16:
-        grade_level = "Good Performance"
-        grade_color = "#10b981"
-    else:
-        grade_level = "Excellent Performance"
-        grade_color = "#6366f1"
-    
-    # Academic Performance Recommendations
-    if input_dict['G1'] < 12 or input_dict['G2'] < 12:
-        recommendations.append({
-            'category': '📚 Academic Performance',
-            'text': 'Your previous grades suggest you need to strengthen your study foundation. Consider reviewing past topics and seeking help from teachers or tutors to improve your understanding of core concepts.'
-        })
-    
-    # Study Time Recommendations
-    if input_dict['studytime'] <= 2:
-        recommendations.append({
-            'category': '⏰ Study Habits',
-            'text': 'You\'re spending less than 5 hours per week studying. Research shows that increasing study time to 5-10 hours weekly can significantly improve academic performance. Try breaking study sessions into manageable chunks.'
-        })
-    
-    # Attendance Issues
-    if input_dict['absences'] > 10:
-        recommendations.append({
-            'category': '🎯 Attendance',
-            'text': f'With {input_dict["absences"]} absences, you\'re missing valuable classroom instruction. Regular attendance is crucial for academic success. Try to minimize absences and catch up on missed material promptly.'
-        })
-    
-    # Alcohol Consumption
-    if input_dict['Dalc'] >= 3 or input_dict['Walc'] >= 4:
-        recommendations.append({
-            'category': '🚨 Health & Lifestyle',
-            'text': 'High alcohol consumption can significantly impact academic performance, memory, and concentration. Consider reducing alcohol intake and exploring healthier stress-relief activities like sports or hobbies.'
-        })
-    
-    # Health Issues
-    if input_dict['health'] <= 2:
-        recommendations.append({
-            'category': '💪 Health & Wellness',
-            'text': 'Poor health can affect your ability to learn and perform well. Consider consulting a healthcare professional, maintaining a balanced diet, getting regular exercise, and ensuring adequate sleep.'
-        })
-    
-    # Family Support
-    if input_dict['famsup'] == 'no':
-        recommendations.append({
-            'category': '👨‍👩‍👧‍👦 Support System',
-            'text': 'Family support plays a crucial role in academic success. Consider having open conversations with family members about your educational goals and seek their encouragement and assistance.'
-        })
-    
-    # Extracurricular Activities
-    if input_dict['activities'] == 'no':
-        recommendations.append({
-            'category': '🎨 Personal Development',
-            'text': 'Participating in extracurricular activities can improve social skills, time management, and overall well-being, which often translates to better academic performance. Consider joining clubs or sports teams.'
-        })
-    
-    # Social Life Balance
-    if input_dict['goout'] >= 4:
-        recommendations.append({
-            'category': '⚖️ Work-Life Balance',
-            'text': 'While social activities are important, excessive going out might impact study time and academic focus. Try to find a healthy balance between social life and academic responsibilities.'
-        })
-    
-    # Past Failures
-    if input_dict['failures'] >= 2:
-        recommendations.append({
-            'category': '🎯 Academic Recovery',
-            'text': 'Having multiple past failures indicates need for academic strategy change. Consider working with a counselor to identify learning challenges, develop better study methods, and create a structured academic plan.'
-        })
-    
-    # Travel Time Impact
-    if input_dict['traveltime'] >= 3:
-        recommendations.append({
-            'category': '🚌 Time Management',
-            'text': 'Long commute times can reduce available study time and increase fatigue. Use travel time productively (reading, audio lessons) or consider finding study spaces closer to school.'
-        })
-    
-    # Technology Access
-    if input_dict['internet'] == 'no':
-        recommendations.append({
-            'category': '💻 Educational Resources',
-            'text': 'Internet access provides valuable educational resources and research opportunities. Consider accessing internet at libraries, school, or community centers to supplement your learning.'
-        })
-    
-    # Higher Education Aspiration
-    if input_dict['higher'] == 'no' and prediction >= 12:
-        recommendations.append({
-            'category': '🎓 Future Planning',
-            'text': 'Your academic potential suggests you could succeed in higher education. Consider exploring post-secondary options, as they can significantly expand career opportunities and earning potential.'
-        })
-    
-    # Positive Reinforcements
-    if prediction >= 14:
-        recommendations.append({
-            'category': '🌟 Keep Up the Great Work',
-            'text': 'You\'re performing well academically! Continue your current study habits, maintain a balanced lifestyle, and consider helping peers who might be struggling - teaching others can reinforce your own learning.'
-        })
-    
-    # If no specific issues, general advice
-    if len(recommendations) == 0 or (len(recommendations) == 1 and recommendations[0]['category'] == '🌟 Keep Up the Great Work'):
-        recommendations.append({
-            'category': '📈 Continuous Improvement',
-            'text': 'You\'re on a good path! Focus on maintaining consistent study habits, staying organized, and setting specific academic goals. Regular self-assessment and seeking feedback can help you continue improving.'
-        })
-    
-    return recommendations, grade_level, grade_color
-
-
 st.sidebar.title("GradePath")
 if "page" not in st.session_state:
     st.session_state["page"] = "Welcome Page"
+if "sidebar_page_radio" not in st.session_state:
+    st.session_state["sidebar_page_radio"] = st.session_state["page"]
 page = st.sidebar.radio(
     "Go to:",
-    ["Welcome Page", "Predict Performance"],
-    index=["Welcome Page", "Predict Performance"].index(st.session_state["page"]),
+    ["Welcome Page", "Predict Performance", "Batch Scoring", "Cohort Analytics"],
     key="sidebar_page_radio"
 )
 st.session_state["page"] = page
 
+registry = get_registry()
+if registry.loaded_at is not None:
+    memory = f" · {registry.memory_bytes / 1e6:.1f} MB" if registry.memory_bytes is not None else ""
+    st.sidebar.caption(f"Model {registry.version} · loaded in {registry.load_seconds:.2f}s{memory}")
+    cache_stats = get_prediction_cache().stats()
+    st.sidebar.caption(f"Prediction cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · {cache_stats['size']} entries")
+
 if page == "Welcome Page":
     set_bg()
 
     st.markdown('<div class="centered">', unsafe_allow_html=True)
     st.markdown('<h1 style="color:white;font-weight:900;font-size:3rem;text-shadow:2px 2px 8px #000;">Student Achievement Predictor</h1>', unsafe_allow_html=True)
     st.markdown('<p style="color:white;font-size:1.3rem;font-weight:300;max-width:600px;margin-bottom:2rem;">Predict your academic success in seconds!<br>Enter your details and discover your potentials.</p>', unsafe_allow_html=True)
-    if st.button('🧮Predict final grade (G3)', key='predict_btn', help='Go to prediction page', use_container_width=False):
+    def go_to_prediction():
+        # Runs before the sidebar radio is created, so its value can still be changed
         st.session_state["page"] = "Predict Performance"
-        st.rerun()
+        st.session_state["sidebar_page_radio"] = "Predict Performance"
+
+    st.button('🧮Predict final grade (G3)', key='predict_btn', help='Go to prediction page', use_container_width=False,
+              on_click=go_to_prediction)
     st.markdown('</div>', unsafe_allow_html=True)
 
 if page == "Predict Performance":
@@ -363,11 +265,10 @@ if page == "Predict Performance":
             romantic, famrel, freetime, goout, Dalc, Walc, health, absences, G1, G2
         ]
         
-        if any(
-            (isinstance(f, str) and (f == "" or f is None)) or
-            (isinstance(f, (int, float)) and f is None)
-            for f in required_fields
-        ):
+        with metrics.stage('validation'):
+            # Unset sliders come back as None
+            missing_field = any(f is None or (isinstance(f, str) and f == "") for f in required_fields)
+        if missing_field:
             st.warning("⚠️ Please fill in all fields before predicting the final grade.")
         else:
             # Prepare input for prediction
@@ -380,41 +281,49 @@ if page == "Predict Performance":
                 'Dalc': Dalc, 'Walc': Walc, 'health': health, 'absences': absences, 'G1': G1, 'G2': G2
             }
             
-            input_df = pd.DataFrame([input_dict])
-            
             try:
-                model = joblib.load('student_model.joblib')
-                prediction = model.predict(input_df)[0]
+                # Prediction and recommendations, shared across sessions for repeated profiles
+                prediction, recommendations, grade_level, grade_color = cached_prediction(input_dict)
                 
                 # Store results in session state
                 st.session_state['prediction'] = prediction
                 st.session_state['input_dict'] = input_dict
                 st.session_state['prediction_made'] = True
                 
-                # Generate recommendations
-                recommendations, grade_level, grade_color = generate_recommendations(input_dict, prediction)
                 st.session_state['recommendations'] = recommendations
                 st.session_state['grade_level'] = grade_level
                 st.session_state['grade_color'] = grade_color
+                # Rendered once per prediction; reruns reuse the same text and mailto link
+                st.session_state['report_text'] = build_report(prediction, grade_level, input_dict)
+                # Likewise the attributions: 30-45x a compiled single-row predict, too much for every rerun
+                predictor = get_registry().predictor()
+                st.session_state['explanation'] = None
+                if isinstance(predictor, CompiledModel):
+                    from gradepath.explain import explain_records
+
+                    with metrics.stage('explain'):
+                        expected_value, _, attributions = explain_records(input_dict, predictor)
+                    st.session_state['explanation'] = (expected_value, attributions.iloc[0])
                 
                 # Display prediction result with enhanced styling
-                st.markdown(f"""
-                    <div class="prediction-result">
-                        <div style="color: #374151; font-size: 1.8rem; font-weight: 600; margin-bottom: 0.5rem;">
-                            🎯 Academic Performance Prediction
-                        </div>
-                        <div class="grade-subtitle">Your predicted final grade is:</div>
-                        <div class="grade-display" style="color: {grade_color};">
-                            {prediction:.1f}<span style="font-size: 2rem; color: #9ca3af;">/20</span>
-                        </div>
-                        <div class="performance-badge" style="background: linear-gradient(135deg, {grade_color} 0%, {grade_color}dd 100%);">
-                            {grade_level}
+                with metrics.stage('render'):
+                    st.markdown(f"""
+                        <div class="prediction-result">
+                            <div style="color: #374151; font-size: 1.8rem; font-weight: 600; margin-bottom: 0.5rem;">
+                                🎯 Academic Performance Prediction
+                            </div>
+                            <div class="grade-subtitle">Your predicted final grade is:</div>
+                            <div class="grade-display" style="color: {grade_color};">
+                                {prediction:.1f}<span style="font-size: 2rem; color: #9ca3af;">/20</span>
+                            </div>
+                            <div class="performance-badge" style="background: linear-gradient(135deg, {grade_color} 0%, {grade_color}dd 100%);">
+                                {grade_level}
+                            </div>
+                            <div style="margin-top: 1.5rem; color: #6b7280; font-size: 1rem; line-height: 1.6;">
+                                This prediction is based on your academic history, study habits, and personal factors.
+                            </div>
                         </div>
-                        <div style="margin-top: 1.5rem; color: #6b7280; font-size: 1rem; line-height: 1.6;">
-                            This prediction is based on your academic history, study habits, and personal factors.
-                        </div>
-                    </div>
-                """, unsafe_allow_html=True)
+                    """, unsafe_allow_html=True)
                 
             except Exception as e:
                 st.error(f"❌ Prediction failed: {e}. Please ensure the model file exists and is compatible.")
@@ -424,27 +333,23 @@ if page == "Predict Performance":
         prediction = st.session_state['prediction']
         input_dict = st.session_state['input_dict']
         
-        # Prepare result text for download/email
-        result_text = f"""Student Achievement Prediction Report
-=====================================
-
-PREDICTION RESULT:
-Final Grade (G3): {prediction:.2f}/20
-Performance Level: {st.session_state.get('grade_level', 'N/A')}
-
-STUDENT PROFILE:
-"""
-        for k, v in input_dict.items():
-            result_text += f"{k}: {v}\n"
+        # Explain which inputs drove the prediction
+        explanation = st.session_state.get('explanation')
+        if explanation is not None:
+            expected_value, contributions = explanation
+            with st.expander("🔎 What drove this prediction?"):
+                top = contributions.reindex(contributions.abs().sort_values(ascending=False).index).head(10)
+                st.caption(f"Starting from the average predicted grade of {expected_value:.1f}, each bar shows how many points a field added or removed.")
+                st.bar_chart(top.rename("Points").rename_axis("Field"), horizontal=True)
         
-        result_text += f"\nGenerated on: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-        result_text += "Report generated by GradePath - Student Achievement Predictor"
+        # Prepare result text for download/email
+        result_text = st.session_state.get('report_text') or build_report(prediction, st.session_state.get('grade_level', 'N/A'), input_dict)
         
         # Action buttons container
         st.markdown('<div class="buttons-container">', unsafe_allow_html=True)
         
         # Create columns for inline buttons
-        col1, col2, col3 = st.columns([1, 1, 1])
+        col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
         
         with col1:
             # Download button
@@ -459,14 +364,8 @@ STUDENT PROFILE:
         
         with col2:
             # Email button (using HTML for styling consistency)
-            import urllib.parse
-            subject = urllib.parse.quote("Student Achievement Prediction Report")
-            body = urllib.parse.quote(result_text)
-            mailto_link = f"mailto:?subject={subject}&body={body}"
-            
-            
             st.markdown(f"""
-                <a href="{mailto_link}" target="_blank" style="text-decoration: none; width: 100%; display: block;">
+                <a href="{mailto_link(result_text)}" target="_blank" style="text-decoration: none; width: 100%; display: block;">
                     <button class="start-btn btn-secondary" style="width: 100%;">📧 Share by Email</button>
                 </a>
             """, unsafe_allow_html=True)
@@ -484,13 +383,24 @@ STUDENT PROFILE:
                     st.session_state['recommendations_visible'] = True
                     st.rerun()
         
+        with col4:
+            # What-if explorer toggle
+            if st.session_state.get('whatif_visible', False):
+                if st.button("🔼 Hide What If", key="hide_whatif_btn", use_container_width=True):
+                    st.session_state['whatif_visible'] = False
+                    st.rerun()
+            else:
+                if st.button("🔀 What If?", key="show_whatif_btn", use_container_width=True):
+                    st.session_state['whatif_visible'] = True
+                    st.rerun()
+        
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Display recommendations if visible
         if st.session_state.get('recommendations_visible', False):
             recommendations = st.session_state.get('recommendations', [])
             
-            st.markdown(f"""
+            st.markdown("""
                 <div class="recommendation-box">
                     <div class="recommendation-title">🤖 AI-Powered Personal Recommendations</div>
                     <p style="color: #6b7280; margin-bottom: 1.5rem;">Based on your inputs and predicted performance, here are tailored suggestions to help improve your academic success:</p>
@@ -505,8 +415,175 @@ STUDENT PROFILE:
                     </div>
                 """, unsafe_allow_html=True)
 
+        # Display what-if scenarios if visible
+        if st.session_state.get('whatif_visible', False):
+            from gradepath.whatif import describe, explore, single_field_effects
+
+            with metrics.stage('whatif'):
+                baseline, scenarios = explore(input_dict, get_registry().predictor())
+            st.markdown(f"""
+                <div class="recommendation-box">
+                    <div class="recommendation-title">🔀 What If You Changed Your Habits?</div>
+                    <p style="color: #6b7280; margin-bottom: 0;">We scored {len(scenarios):,} variations of your profile with different study time, absences, going out and alcohol habits. Starting from your predicted {baseline:.1f}/20, these changes move your grade the most:</p>
+                </div>
+            """, unsafe_allow_html=True)
+            effects = single_field_effects(scenarios, input_dict)
+            st.dataframe(
+                effects.rename(columns={'field': 'Habit', 'change': 'Best single change', 'delta': 'Grade change'}),
+                hide_index=True, use_container_width=True,
+                column_config={'Grade change': st.column_config.NumberColumn(format="%+.2f")},
+            )
+            top = scenarios.head(10)
+            st.dataframe(
+                pd.DataFrame({
+                    'Combined changes': [describe(row, input_dict) for _, row in top.iterrows()],
+                    'Predicted G3': top['predicted_G3'],
+                    'Grade change': top['delta'],
+                }),
+                hide_index=True, use_container_width=True,
+                column_config={
+                    'Predicted G3': st.column_config.NumberColumn(format="%.2f"),
+                    'Grade change': st.column_config.NumberColumn(format="%+.2f"),
+                },
+            )
+
     st.markdown('</div>', unsafe_allow_html=True)
 
+if page == "Batch Scoring":
+    from gradepath.batch import count_rows, read_roster, roster_format, score_chunks
+    from gradepath.export import export_cohort, frame_chunks
+
+    st.markdown('<h2 style="color:#2563eb;font-weight:1100;">Score a Whole Class</h2>', unsafe_allow_html=True)
+    st.markdown('''
+        <div style="background:rgba(99,102,241,0.08);border-radius:1rem;padding:1.2rem 2rem;margin-bottom:1.5rem;max-width:900px;color:#222;font-size:1.05rem;line-height:1.7;">
+        Upload a <b>CSV</b> or <b>Parquet</b> roster with one row per student and the same 32 columns as the prediction form
+        (<code>school</code>, <code>sex</code>, <code>age</code>, ... <code>G1</code>, <code>G2</code>), using the values listed in the Input Guide.
+        Rows with invalid values are skipped and reported per column.
+        </div>
+    ''', unsafe_allow_html=True)
+
+    uploaded = st.file_uploader("Roster file", type=["csv", "parquet"])
+    if uploaded is not None and st.button("🔮 Score Roster", use_container_width=True):
+        try:
+            fmt = roster_format(uploaded.name)
+            total_rows = count_rows(uploaded, fmt)
+            registry = get_registry()
+            model = registry.predictor()
+            progress = st.progress(0.0, text="Scoring roster...")
+            scored_parts = []
+            rejected_rows = 0
+            column_errors = {}
+            done = 0
+            scored_chunks = score_chunks(model, read_roster(uploaded, fmt))
+            for scored, rejected, errors in audit.record_chunks(scored_chunks, registry.version, 'batch'):
+                metrics.inc('gradepath_predictions_total', len(scored), source='batch')
+                scored_parts.append(scored)
+                rejected_rows += len(rejected)
+                for col, count in errors.items():
+                    column_errors[col] = column_errors.get(col, 0) + count
+                done += len(scored) + len(rejected)
+                progress.progress(min(done / max(total_rows, 1), 1.0), text=f"Scored {done:,} of {total_rows:,} students")
+            results = pd.concat(scored_parts, ignore_index=True) if scored_parts else None
+            # Nothing valid to show, download or analyse; only the rejections are reported
+            st.session_state['batch_results'] = results if results is not None and len(results) else None
+            st.session_state['batch_rejected'] = rejected_rows
+            st.session_state['batch_errors'] = column_errors
+        except Exception as e:
+            st.session_state['batch_results'] = None
+            st.session_state['batch_rejected'] = 0
+            st.error(f"❌ Batch scoring failed: {e}")
+
+    results = st.session_state.get('batch_results')
+    if results is not None:
+        st.success(f"✅ Scored {len(results):,} students.")
+    elif st.session_state.get('batch_rejected'):
+        st.error("❌ No student could be scored; check the values against the Input Guide.")
+    if st.session_state.get('batch_rejected'):
+        st.warning(f"⚠️ {st.session_state['batch_rejected']:,} rows were skipped because of invalid values.")
+        st.dataframe(
+            pd.DataFrame(sorted(st.session_state['batch_errors'].items()), columns=["Column", "Invalid rows"]),
+            hide_index=True,
+        )
+    if results is not None:
+        st.dataframe(results['grade_level'].value_counts().rename("Students"))
+        st.dataframe(results.head(1000), hide_index=True)
+        st.download_button(
+            label="📄 Download Scored Roster",
+            data=results.to_csv(index=False),
+            file_name=f"scored_roster_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
+            mime="text/csv",
+            use_container_width=True,
+        )
+
+        def report_archive(results=results):
+            # Built only when the button is clicked, on Streamlit's download thread
+            buffer = io.BytesIO()
+            export_cohort(frame_chunks(results), buffer, 'zip')
+            return buffer.getvalue()
+
+        st.download_button(
+            label="🗂️ Download All Student Reports (ZIP)",
+            data=report_archive,
+            file_name=f"student_reports_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.zip",
+            mime="application/zip",
+            use_container_width=True,
+        )
+
+if page == "Cohort Analytics":
+    from gradepath.analytics import DIMENSIONS, dataset_digest, get_cohort_cache
+    from gradepath.batch import read_roster, roster_format, score_chunks
+
+    st.markdown('<h2 style="color:#2563eb;font-weight:1100;">Cohort Analytics</h2>', unsafe_allow_html=True)
+    cohorts = get_cohort_cache()
+    results = st.session_state.get('batch_results')
+    if results is not None and len(results):
+        # The roster scored on the Batch Scoring page
+        key = dataset_digest(results)
+        with metrics.stage('analytics_aggregate'):
+            aggregator = cohorts.aggregate(key, [results])
+        st.caption(f"Showing the roster scored on the Batch Scoring page ({len(results):,} students).")
+    else:
+        st.caption("Score a roster on the Batch Scoring page, or upload one here to see its grade distributions.")
+        uploaded = st.file_uploader("Roster file", type=["csv", "parquet"], key="analytics_roster")
+        aggregator = key = None
+        if uploaded is not None:
+            registry = get_registry()
+            predictor = registry.predictor()
+            # The model version is part of the key so a hot reload rescores the roster
+            key = f"{registry.version}-{hashlib.sha256(uploaded.getvalue()).hexdigest()[:16]}"
+            aggregator = cohorts.get(key) or st.session_state.get('analytics_cohort', {}).get(key)
+            if aggregator is None:
+                with st.spinner("Scoring and aggregating roster..."), metrics.stage('analytics_aggregate'):
+                    # Only the aggregates are kept; scored chunks are dropped as they are counted
+                    chunks = (scored for scored, _, _ in score_chunks(
+                        predictor, read_roster(uploaded, roster_format(uploaded.name))))
+                    aggregator = cohorts.aggregate(key, chunks)
+            st.session_state['analytics_cohort'] = {key: aggregator}
+
+    if aggregator is not None and aggregator.rows:
+        overview = aggregator.overview()
+        cols = st.columns(3)
+        cols[0].metric("Students", f"{overview['students']:,}")
+        cols[1].metric("Mean predicted G3", f"{overview['mean']:.1f}")
+        cols[2].metric("At Risk", f"{overview['bands']['At Risk']:.0%}")
+
+        with metrics.stage('analytics_render'):
+            st.image(cohorts.chart(key, 'distribution', aggregator), caption="Predicted G3 across the cohort")
+            for left, right in (('school', 'studytime'), ('absences', 'grid')):
+                col1, col2 = st.columns(2)
+                col1.image(cohorts.chart(key, left, aggregator))
+                col2.image(cohorts.chart(key, right, aggregator),
+                           caption="Mean predicted G3 by study time and absences" if right == 'grid' else None)
+
+        for dimension, (title, _) in DIMENSIONS.items():
+            with st.expander(f"Summary by {title.lower()}"):
+                table = aggregator.group_table(dimension)
+                st.dataframe(
+                    table, hide_index=True, use_container_width=True,
+                    column_config={c: st.column_config.NumberColumn(format="%.1f") for c in table.columns[2:]},
+                )
+        st.caption("Quartiles are read from half-point histograms; means and band shares are exact.")
+
 # Ensure page state persistence
 if "page" in st.session_state:
     page = st.session_state["page"]
@@ -0,0 +1,97 @@
+"""Load-test the prediction API with and without micro-batching.
+
+Starts ``python -m gradepath.api`` on a local port for each configuration and
+drives it with concurrent keep-alive clients, reporting throughput and
+latency percentiles.
+
+    python benchmarks/bench_api.py [--clients 64] [--requests 3000]
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from common import ROOT, percentile, random_records  # also puts the repo root on sys.path
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"API did not start on port {port}")
+
+
+def drive(port, bodies, clients):
+    """Send every body from `clients` threads; returns (elapsed seconds, latencies, errors)"""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    next_index = iter(range(len(bodies)))
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine = []
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                break
+            start = time.perf_counter()
+            conn.request('POST', '/predict', body=bodies[i], headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            mine.append(time.perf_counter() - start)
+            if response.status != 200:
+                with lock:
+                    errors.append(response.status)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    bodies = [json.dumps(r).encode() for r in random_records(args.requests, seed=3)]
+    configs = [("one call per request", ['--max-batch', '1', '--max-wait-ms', '0']),
+               ("micro-batched", ['--max-batch', '64', '--max-wait-ms', '5'])]
+    for label, flags in configs:
+        server = subprocess.Popen(
+            [sys.executable, '-W', 'ignore', '-m', 'gradepath.api', '--port', str(args.port), *flags],
+            cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT),
+        )
+        try:
+            wait_until_up(args.port)
+            drive(args.port, bodies[:200], min(args.clients, 8))  # warm-up
+            elapsed, latencies, errors = drive(args.port, bodies, args.clients)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{label:<22} {len(latencies) / elapsed:8.0f} req/s  "
+              f"p50 {percentile(latencies, 50) * 1e3:7.1f} ms  p95 {percentile(latencies, 95) * 1e3:7.1f} ms  "
+              f"p99 {percentile(latencies, 99) * 1e3:7.1f} ms  errors {len(errors)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
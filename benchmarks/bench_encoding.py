@@ -0,0 +1,58 @@
+"""Check the precomputed FeatureEncoder against the fitted ColumnTransformer and time both.
+
+    python benchmarks/bench_encoding.py [--rows 10000]
+"""
+import argparse
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from common import best_of, random_profiles  # also puts the repo root on sys.path
+from gradepath.encoding import FeatureEncoder
+from gradepath.forest import CompiledModel
+from gradepath.registry import MODEL_PATH
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    pipeline = joblib.load(args.model)
+    transformer = pipeline.steps[0][1]
+    encoder = FeatureEncoder.from_column_transformer(transformer)
+    compiled = CompiledModel.from_pipeline(pipeline)
+
+    df = random_profiles(args.rows)
+    records = df.to_dict('records')
+    expected = transformer.transform(df)
+    checks = {
+        'encode(records)': np.array_equal(expected, encoder.encode(records)),
+        'encode_columns(frame)': np.array_equal(expected, encoder.encode_columns(df)),
+        'compiled predictions': np.array_equal(pipeline.predict(df), compiled.predict_records(records)),
+    }
+    for name, ok in checks.items():
+        print(f"{name:<24} identical on {args.rows:,} rows: {ok}")
+
+    one = records[0]
+    out = np.empty((1, encoder.n_features))
+    timings = [
+        ("DataFrame + ColumnTransformer, 1 row", lambda: transformer.transform(pd.DataFrame([one])), 20),
+        ("FeatureEncoder.encode, 1 row", lambda: encoder.encode(one, out=out), 200),
+        ("pipeline.predict, 1 row", lambda: pipeline.predict(pd.DataFrame([one])), 20),
+        ("CompiledModel.predict_records, 1 row", lambda: compiled.predict_records(one), 200),
+        (f"ColumnTransformer, {args.rows:,} rows", lambda: transformer.transform(df), 3),
+        (f"FeatureEncoder.encode_columns, {args.rows:,} rows", lambda: encoder.encode_columns(df), 3),
+    ]
+    for name, fn, repeat in timings:
+        print(f"{name:<44} {best_of(fn, repeat) * 1e3:9.3f} ms")
+    return 0 if all(checks.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""Check the flattened forest against sklearn and compare prediction latency.
+
+    python benchmarks/bench_forest.py [--rows 10000]
+"""
+import argparse
+import sys
+import warnings
+
+import joblib
+import numpy as np
+
+from common import best_of  # also puts the repo root on sys.path
+from gradepath.forest import FlatForest
+from gradepath.registry import MODEL_PATH
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--model", default=MODEL_PATH)
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    regressor = joblib.load(args.model).steps[-1][1]
+    forest = FlatForest.from_regressor(regressor)
+    print(f"{forest.n_trees} trees, {len(forest.value):,} nodes, depth {forest.depth}, {forest.nbytes / 1e6:.1f} MB")
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(scale=3.0, size=(args.rows, forest.n_features))
+    identical = np.array_equal(regressor.predict(X), forest.predict(X))
+    print(f"identical predictions on {args.rows:,} rows: {identical}")
+
+    for rows in (1, 10, 100, args.rows):
+        batch = X[:rows]
+        sk = best_of(lambda: regressor.predict(batch), 20 if rows < 1000 else 3)
+        flat = best_of(lambda: forest.predict(batch), 20 if rows < 1000 else 3)
+        print(f"{rows:>7,} rows  sklearn {sk * 1e3:9.3f} ms  flat {flat * 1e3:9.3f} ms  speedup {sk / flat:6.1f}x")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
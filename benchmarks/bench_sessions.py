@@ -0,0 +1,288 @@
+"""Load-test the Streamlit app with concurrent headless browser sessions.
+
+Starts the warmed-up app (``python -m gradepath.web``) and drives it with
+simulated users that speak Streamlit's websocket protocol the way the browser
+does. Each user opens the welcome page, goes to the form and submits a
+random student profile, shows and hides the tips, and downloads the report.
+A step's latency runs from sending the widget change to the server's
+script_finished message, so time spent waiting behind other sessions' reruns
+is included.
+
+Each concurrency level runs against a fresh server, warmed up with one
+discarded session. The report per level is the throughput, p50/p95/p99 per
+step, and the server's resident memory growth per session, measured while
+the finished sessions are still connected. The client shares the machine
+with the server; on a single core it takes a share of the CPU the server
+would otherwise get.
+
+The run fails (exit code 1) when a session hits an error, when any step's
+p95 exceeds ``--max-p95-ms``, or when memory per session exceeds
+``--max-rss-per-session`` MB, at any level.
+
+    python benchmarks/bench_sessions.py [--concurrency 1,4,16,32] [--port 8599]
+    python benchmarks/bench_sessions.py --concurrency 16 --max-p95-ms 8000 --max-rss-per-session 5
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+from common import ROOT, percentile, process_memory, random_records  # also puts the repo root on sys.path
+from gradepath.schema import FEATURE_COLUMNS
+
+STEPS = ('welcome', 'open_form', 'submit', 'tips_on', 'tips_off', 'download')
+FORM_WIDGETS = ('selectbox', 'slider', 'number_input')
+
+
+class Session:
+    """One simulated browser tab: sends widget interactions and keeps the elements of the last run"""
+
+    def __init__(self, port, timeout=120.0):
+        self.http_url = f"http://127.0.0.1:{port}"
+        self.ws_url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        self.timeout = timeout
+        self.elements = []  # (element type, proto) of the last finished run, in script order
+        self.latencies = {}
+        self._cache = {}
+        self._page_script_hash = ''
+        self._ws = None
+
+    async def connect(self):
+        import websockets
+
+        self._ws = await websockets.connect(self.ws_url, subprotocols=['streamlit'], max_size=None)
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def _receive(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = ForwardMsg()
+        msg.ParseFromString(await asyncio.wait_for(self._ws.recv(), self.timeout))
+        if msg.HasField('ref_hash'):
+            # A message this tab reported as cached, re-sent by reference for a new position
+            cached = ForwardMsg()
+            cached.CopyFrom(self._cache[msg.ref_hash])
+            cached.metadata.CopyFrom(msg.metadata)
+            msg = cached
+        elif msg.metadata.cacheable:
+            self._cache[msg.hash] = msg
+        return msg
+
+    async def rerun(self, step, widget_states=()):
+        """Send a rerun with the given widget states and wait for the script to finish"""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        back = BackMsg()
+        back.rerun_script.page_script_hash = self._page_script_hash
+        back.rerun_script.cached_message_hashes.extend(self._cache)
+        back.rerun_script.widget_states.widgets.extend(widget_states)
+        start = time.perf_counter()
+        await self._ws.send(back.SerializeToString())
+        elements = []
+        while True:
+            msg = await self._receive()
+            kind = msg.WhichOneof('type')
+            if kind == 'new_session':
+                self._page_script_hash = msg.new_session.page_script_hash
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                element_type = msg.delta.new_element.WhichOneof('type')
+                elements.append((element_type, getattr(msg.delta.new_element, element_type)))
+            elif kind == 'script_finished':
+                if msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    # st.rerun(): the run that follows is the one the user sees
+                    elements = []
+                    continue
+                break
+        self.latencies[step] = time.perf_counter() - start
+        self.elements = elements
+        errors = [proto.message for element_type, proto in elements if element_type == 'exception']
+        if errors:
+            raise RuntimeError(f"{step}: the app raised {errors[0]}")
+
+    def find(self, element_type, key=None, label=None):
+        """Return the proto of the first element of the last run with this type and widget key or label"""
+        for found_type, proto in self.elements:
+            if found_type != element_type:
+                continue
+            if key is not None and not proto.id.endswith('-' + key):
+                continue
+            if label is not None and not proto.label.startswith(label):
+                continue
+            return proto
+        raise LookupError(f"No {element_type} with key={key!r} label={label!r} on the page")
+
+    async def click(self, step, element_type='button', key=None, label=None):
+        await self.rerun(step, [trigger(self.find(element_type, key, label))])
+
+    async def submit_form(self, step, profile):
+        """Set every form field from profile and press the form's submit button"""
+        fields = [(element_type, proto) for element_type, proto in self.elements
+                  if element_type in FORM_WIDGETS and proto.form_id]
+        if len(fields) != len(FEATURE_COLUMNS):
+            raise LookupError(f"Expected {len(FEATURE_COLUMNS)} form fields, found {len(fields)}")
+        states = [field_state(element_type, proto, profile[column])
+                  for (element_type, proto), column in zip(fields, FEATURE_COLUMNS)]
+        submit = next(proto for element_type, proto in self.elements
+                      if element_type == 'button' and proto.is_form_submitter)
+        await self.rerun(step, states + [trigger(submit)])
+
+    async def download(self, step, label):
+        """Fetch a download button's file, as the browser does, then send the click's rerun"""
+        proto = self.find('download_button', label=label)
+        start = time.perf_counter()
+        data = await asyncio.to_thread(_fetch, self.http_url + proto.url, self.timeout)
+        fetch_seconds = time.perf_counter() - start
+        if not proto.ignore_rerun:
+            await self.rerun(step, [trigger(proto)])
+        self.latencies[step] = self.latencies.get(step, 0.0) + fetch_seconds
+        return data
+
+
+def _fetch(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def trigger(proto):
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    return WidgetState(id=proto.id, trigger_value=True)
+
+
+def field_state(element_type, proto, value):
+    """Return the WidgetState the browser sends for a selectbox, slider or number input set to value"""
+    from streamlit.proto.NumberInput_pb2 import NumberInput
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    state = WidgetState(id=proto.id)
+    if element_type == 'selectbox':
+        state.string_value = str(value)
+    elif element_type == 'slider':
+        state.double_array_value.data[:] = [float(value)]
+    elif proto.data_type == NumberInput.INT:
+        state.int_value = int(value)
+    else:
+        state.double_value = float(value)
+    return state
+
+
+async def user_flow(session, profile):
+    """Welcome page, form submission, tips on and off, report download"""
+    await session.rerun('welcome')
+    await session.click('open_form', key='predict_btn')
+    await session.submit_form('submit', profile)
+    if not any(element_type == 'markdown' and 'grade-display' in proto.body for element_type, proto in session.elements):
+        raise RuntimeError("submit: no prediction on the page")
+    await session.click('tips_on', key='show_recommendations_btn')
+    await session.click('tips_off', key='hide_recommendations_btn')
+    report = await session.download('download', label='📄 Download Report')
+    if b'G3' not in report:
+        raise RuntimeError("download: the report does not mention G3")
+
+
+async def run_sessions(port, profiles, while_connected=None):
+    """Run one flow per profile concurrently.
+
+    Returns (sessions, errors, seconds, result of while_connected()), which is
+    called once every flow has finished and before any session disconnects.
+    """
+    sessions = [Session(port) for _ in profiles]
+    errors = []
+
+    async def one(session, profile):
+        try:
+            await session.connect()
+            await user_flow(session, profile)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(session, profile) for session, profile in zip(sessions, profiles)))
+        elapsed = time.perf_counter() - start
+        result = while_connected() if while_connected else None
+    finally:
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+    return sessions, errors, elapsed, result
+
+
+def start_server(port):
+    from gradepath.warmup import check
+
+    server = subprocess.Popen(
+        [sys.executable, '-W', 'ignore', '-m', 'gradepath.web', '--port', str(port)],
+        cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if check(f"http://127.0.0.1:{port}/ready")[0] == 200:
+            return server
+        if server.poll() is not None:
+            break
+        time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"App did not become ready on port {port}")
+
+
+async def measure(port, server, profiles):
+    """Warm the server up with one discarded session, then run the rest; returns run_sessions() output with RSS growth"""
+    _, errors, _, _ = await run_sessions(port, profiles[:1])
+    if errors:
+        raise RuntimeError(f"Warm-up session failed: {errors[0]}")
+    before = process_memory(server.pid)['rss']
+    sessions, errors, elapsed, after = await run_sessions(port, profiles[1:], lambda: process_memory(server.pid)['rss'])
+    return sessions, errors, elapsed, after - before
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated numbers of simultaneous sessions")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="fail when any step's p95 exceeds this")
+    parser.add_argument("--max-rss-per-session", type=float, default=None,
+                        help="fail when server memory growth per session exceeds this many MB")
+    args = parser.parse_args(argv)
+
+    regressions = []
+    failed = False
+    for level in [int(n) for n in args.concurrency.split(',')]:
+        profiles = random_records(level + 1, seed=level)
+        server = start_server(args.port)
+        try:
+            sessions, errors, elapsed, growth = asyncio.run(measure(args.port, server, profiles))
+        finally:
+            server.terminate()
+            server.wait()
+        done = [session for session in sessions if len(session.latencies) == len(STEPS)]
+        reruns = sum(len(session.latencies) for session in sessions)
+        print(f"{level} concurrent sessions: {len(done) / elapsed:.2f} flows/s, {reruns / elapsed:.1f} steps/s, "
+              f"{len(errors)} errors, server RSS {growth / 1e6:+.1f} MB ({growth / level / 1e6:+.2f} MB/session)")
+        print(f"  {'step':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for step in STEPS:
+            latencies = [session.latencies[step] for session in sessions if step in session.latencies]
+            if latencies:
+                p95 = percentile(latencies, 95) * 1e3
+                print(f"  {step:<10} {percentile(latencies, 50) * 1e3:9.1f} {p95:9.1f} "
+                      f"{percentile(latencies, 99) * 1e3:9.1f}")
+                if args.max_p95_ms is not None and p95 > args.max_p95_ms:
+                    regressions.append(f"{level} sessions: {step} p95 {p95:.1f} ms > {args.max_p95_ms:g} ms")
+        for error in sorted(set(errors))[:5]:
+            print(f"  error: {error}")
+        per_session = growth / level / 1e6
+        if args.max_rss_per_session is not None and per_session > args.max_rss_per_session:
+            regressions.append(f"{level} sessions: {per_session:.2f} MB/session > {args.max_rss_per_session:g} MB")
+        failed = failed or bool(errors)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
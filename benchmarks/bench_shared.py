@@ -0,0 +1,101 @@
+"""Compare per-worker memory and load time of the memory-mapped bundle against joblib.load.
+
+Starts ``--workers`` processes per mode, one after another, each loading the
+model the way the registry does and scoring a batch, so every page it needs
+is touched. Each worker measures its own growth from just before the load to
+just after scoring, while the workers started before it keep running. From
+the second worker on, pages that can be shared already are, so the median
+shows what each additional worker costs. The workers' summed PSS, read once
+all of them are running, is their combined footprint on the host. Both modes
+do the same imports a warmed-up server does (sklearn included) before
+measuring.
+
+    python benchmarks/bench_shared.py [--workers 4]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import ROOT, process_memory, random_profiles  # also puts the repo root on sys.path
+
+MODES = ('joblib', 'mmap')
+
+
+def worker(mode, rows):
+    """Load the model in this process, score a batch, report, then stay alive until stdin closes"""
+    import importlib
+    import warnings
+
+    from gradepath.registry import ModelRegistry
+    from gradepath.warmup import WARM_IMPORTS
+
+    warnings.simplefilter('ignore')
+    for name in WARM_IMPORTS:
+        importlib.import_module(name)
+
+    profiles = random_profiles(rows, seed=1)
+    before = process_memory()
+    start = time.perf_counter()
+    registry = ModelRegistry(poll_interval=None, mmap=mode == 'mmap')
+    predictor = registry.predictor()
+    load_seconds = time.perf_counter() - start
+    checksum = float(predictor.predict(profiles).sum())
+    after = process_memory()
+    print(json.dumps({'before': before, 'after': after, 'load_seconds': load_seconds, 'checksum': checksum}), flush=True)
+    sys.stdin.read()
+
+
+def run_mode(mode, workers, rows):
+    """Start the workers one after another; returns (per-worker reports, PSS of each once all are running)"""
+    procs, reports = [], []
+    try:
+        for _ in range(workers):
+            proc = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--worker', mode, '--rows', str(rows)],
+                cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+            )
+            procs.append(proc)
+            reports.append(json.loads(proc.stdout.readline()))
+        return reports, [process_memory(proc.pid)['pss'] for proc in procs]
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=1000, help="rows each worker scores after loading")
+    parser.add_argument("--worker", choices=MODES, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker(args.worker, args.rows)
+        return 0
+
+    # Write the bundle up front so no mmap worker pays for it
+    subprocess.run([sys.executable, '-W', 'ignore', '-m', 'gradepath.shared'], cwd=ROOT, check=True)
+    checksums = set()
+    print(f"{args.workers} workers per mode, warm page cache")
+    print(f"{'mode':<8} {'load ms':>9} {'RSS +MB':>9} {'private +MB':>12} {'PSS all workers MB':>19}")
+    for mode in MODES:
+        reports, pss = run_mode(mode, args.workers, args.rows)
+        checksums.update(round(r['checksum'], 6) for r in reports)
+        growth = {key: statistics.median((r['after'][key] - r['before'][key]) / 1e6 for r in reports)
+                  for key in ('rss', 'private')}
+        load_ms = statistics.median(r['load_seconds'] for r in reports) * 1e3
+        print(f"{mode:<8} {load_ms:9.1f} {growth['rss']:9.1f} {growth['private']:12.1f} "
+              f"{sum(pss) / 1e6:19.1f}")
+    if len(checksums) != 1:
+        print(f"Predictions differ between modes: {sorted(checksums)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gradepath.schema import CATEGORICAL_VALUES, FEATURE_COLUMNS, NUMERIC_RANGES  # noqa: E402
+
+
+def random_profiles(rows, seed=0):
+    """Return a DataFrame of synthetic students drawn from the prediction form's value domains"""
+    rng = np.random.default_rng(seed)
+    columns = {c: rng.choice(values, rows) for c, values in CATEGORICAL_VALUES.items()}
+    columns.update({c: rng.integers(low, high + 1, rows) for c, (low, high) in NUMERIC_RANGES.items()})
+    return pd.DataFrame(columns)[FEATURE_COLUMNS]
+
+
+def random_records(rows, seed=0):
+    """Same as random_profiles, as a list of input_dict-style dicts with Python scalars"""
+    return [{k: v.item() if hasattr(v, 'item') else v for k, v in row.items()}
+            for row in random_profiles(rows, seed).to_dict('records')]
+
+
+def best_of(fn, repeat):
+    """Return the fastest of repeat timed calls, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def percentile(values, q):
+    """Return the q-th percentile (1-99) of a list of numbers"""
+    return statistics.quantiles(values, n=100)[q - 1] if len(values) > 1 else values[0]
+
+
+def process_memory(pid='self'):
+    """Return Rss, Pss and private (Private_Clean + Private_Dirty) bytes of a process, from /proc"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return {'rss': values['Rss'], 'pss': values['Pss'], 'private': values['Private_Clean'] + values['Private_Dirty']}
@@ -0,0 +1,289 @@
+"""Time and measure memory for each stage of the prediction path, and compare with a baseline.
+
+    python benchmarks/run_suite.py                   # compare with benchmarks/baseline.json
+    python benchmarks/run_suite.py --update-baseline # record a new baseline on this machine
+    python benchmarks/run_suite.py --quick           # skip the largest batch sizes
+    python benchmarks/run_suite.py --quick --update-baseline
+
+The stage list is run ``--rounds`` times, one round after the other. Each
+round times every stage at least its repeat count and for at least
+``MIN_MEASURE_SECONDS``. A stage's result is its fastest run over all
+rounds, the time least disturbed by other work on the machine, so a
+slowdown shorter than the run cannot make a stage look slower.
+Stages that still look slower than the baseline are timed again, for up to
+``RETIME_SECONDS`` each, until they are back within the threshold; only those
+that never are get reported. Peak allocated memory is
+measured in a separate tracemalloc run so tracing does not skew the times.
+The explanation stages are also reported as a multiple of predicting the
+same rows with the compiled model.
+
+Shared hosts also slow down as a whole for minutes at a time, longer than a
+run. The ``host_calibration`` stage times a fixed workload that no change to
+this repo affects. When it is slower than in the baseline, the time
+thresholds are loosened by the same factor, but by at most
+``MAX_HOST_SLOWDOWN``, so a real regression cannot hide behind a slow host;
+they are never tightened.
+
+The run fails (exit code 1) when a stage is slower than ``--threshold`` times
+its baseline, or allocates more than ``--memory-threshold`` times as much.
+``--quick`` runs have their own baseline, kept in the same file: with smaller
+batches the process heap differs, and even stages of the same size, such as
+model_load, time differently than in a full run.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from common import ROOT, random_profiles, random_records  # also puts the repo root on sys.path
+from gradepath.analytics import CohortAggregator
+from gradepath.assets import background_css
+from gradepath.explain import explain_records, get_explainer
+from gradepath.forest import CompiledModel
+from gradepath.recommendations import generate_recommendations, recommend_batch
+from gradepath.registry import MODEL_PATH
+from gradepath.report import build_report
+
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+BATCH_SIZES = (1, 10, 100, 1000, 10000, 100000)
+QUICK_BATCH_SIZES = (1, 10, 100, 1000)
+
+# A stage must also be this much slower than its baseline, so timer resolution
+# alone never fails a microsecond stage
+MIN_REGRESSION_SECONDS = 0.0001
+# Most the time thresholds are widened for a host slower than at baseline time
+MAX_HOST_SLOWDOWN = 1.2
+# How long a stage that looks slower keeps being timed before it is reported
+RETIME_SECONDS = 10.0
+# Keep repeating a stage within a round until this much time has been spent timing it
+MIN_MEASURE_SECONDS = 0.2
+CALIBRATION_STAGE = 'host_calibration'
+# Explanation stages and the compiled predict of the same rows they are reported against
+EXPLAIN_RATIOS = {'explain_1': 'predict_compiled_1', 'explain_100': 'predict_compiled_100'}
+
+
+def calibration_workload():
+    """Allocation-heavy interpreter and NumPy work, independent of the repo's code"""
+    rows = [{'id': i, 'name': str(i)} for i in range(20000)]
+    rows.sort(key=lambda row: row['name'])
+    np.sort(np.random.default_rng(0).random(100_000))
+
+
+def fastest(fn, repeat):
+    """Return the fastest of at least repeat timed calls of fn"""
+    best = float('inf')
+    spent, calls = 0.0, 0
+    while calls < repeat or spent < MIN_MEASURE_SECONDS:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        calls += 1
+    return best
+
+
+def peak_bytes(fn):
+    """Return the peak memory traced while fn runs"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def stages(model_path, batch_sizes):
+    """Yield (stage name, callable, repeat) for every measured stage"""
+    pipeline = joblib.load(model_path)
+    compiled = CompiledModel.from_pipeline(pipeline)
+    largest = max(batch_sizes)
+    profiles = random_profiles(largest, seed=1)
+    records = random_records(1000, seed=2)
+    record = records[0]
+    predictions = pipeline.predict(profiles.head(10000))
+    prediction = float(predictions[0])
+    timestamp = pd.Timestamp('2026-01-01 12:00:00')
+
+    yield CALIBRATION_STAGE, calibration_workload, 10
+    yield 'model_load', lambda: joblib.load(model_path), 3
+    yield 'model_compile', lambda: CompiledModel.from_pipeline(pipeline), 5
+    yield 'dataframe_1', lambda: pd.DataFrame([record]), 50
+    yield 'dataframe_1000', lambda: pd.DataFrame(records), 10
+    for n in batch_sizes:
+        batch = profiles.head(n)
+        yield f'predict_pipeline_{n}', lambda batch=batch: pipeline.predict(batch), 20 if n <= 1000 else 3
+    for n in (1, 10, 100):
+        rows = records[:n]
+        yield f'predict_compiled_{n}', lambda rows=rows: compiled.predict_records(rows), 50
+    get_explainer(compiled)
+    yield 'explain_1', lambda: explain_records(record, compiled), 10
+    yield 'explain_100', lambda: explain_records(records[:100], compiled), 3
+    yield 'generate_recommendations', lambda: generate_recommendations(record, prediction), 200
+    head = profiles.head(10000)
+    # Only as many rows as --quick generates
+    yield f'recommend_batch_{len(head)}', lambda: recommend_batch(head, predictions), 3
+    yield 'report_text', lambda: build_report(prediction, 'Needs Improvement', record, timestamp), 200
+    cohort = profiles.assign(predicted_G3=np.resize(predictions, len(profiles)))
+    yield f'cohort_aggregate_{largest}', lambda: CohortAggregator().update(cohort), 5
+
+    def set_bg_cold():
+        background_css.cache_clear()
+        return background_css('.stApp')
+
+    yield 'set_bg_cold', set_bg_cold, 10
+    yield 'set_bg_cached', lambda: background_css('.stApp'), 200
+
+
+def time_rounds(measured, rounds):
+    """Time every (name, fn, repeat) stage once per round; returns each stage's fastest seconds"""
+    seconds = {}
+    for round_number in range(1, rounds + 1):
+        print(f"Round {round_number} of {rounds}", flush=True)
+        for name, fn, repeat in measured:
+            fn()  # warm-up
+            seconds[name] = min(seconds.get(name, float('inf')), fastest(fn, repeat))
+    return seconds
+
+
+def run(measured, rounds):
+    seconds = time_rounds(measured, rounds)
+    results = {}
+    for name, fn, _ in measured:
+        results[name] = {'seconds': seconds[name], 'peak_bytes': peak_bytes(fn)}
+        print(f"{name:<28} {seconds[name] * 1e3:11.3f} ms  {results[name]['peak_bytes'] / 1e6:9.2f} MB", flush=True)
+    return results
+
+
+def explain_ratios(results):
+    """Return how many times longer each explanation stage took than predicting its rows"""
+    return {name: results[name]['seconds'] / results[base]['seconds']
+            for name, base in EXPLAIN_RATIOS.items() if name in results and base in results}
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def is_slower(seconds, baseline_seconds, threshold):
+    return seconds > baseline_seconds * threshold and seconds - baseline_seconds > MIN_REGRESSION_SECONDS
+
+
+def host_slowdown(results, baseline):
+    """Return how much slower the calibration stage ran than in the baseline, between 1 and MAX_HOST_SLOWDOWN"""
+    if CALIBRATION_STAGE not in results or CALIBRATION_STAGE not in baseline:
+        return 1.0
+    slowdown = results[CALIBRATION_STAGE]['seconds'] / baseline[CALIBRATION_STAGE]['seconds']
+    return min(max(1.0, slowdown), MAX_HOST_SLOWDOWN)
+
+
+def retime_slower(measured, results, baseline, threshold):
+    """Time stages slower than the baseline again until they are not, or RETIME_SECONDS pass"""
+    threshold *= host_slowdown(results, baseline)
+    suspects = [(name, fn, repeat) for name, fn, repeat in measured
+                if name in baseline and name != CALIBRATION_STAGE
+                and is_slower(results[name]['seconds'], baseline[name]['seconds'], threshold)]
+    if suspects:
+        print(f"Re-timing {len(suspects)} stage(s) slower than the baseline", flush=True)
+    for name, fn, repeat in suspects:
+        deadline = time.monotonic() + RETIME_SECONDS
+        while (is_slower(results[name]['seconds'], baseline[name]['seconds'], threshold)
+               and time.monotonic() < deadline):
+            fn()  # warm-up
+            results[name]['seconds'] = min(results[name]['seconds'], fastest(fn, repeat))
+        print(f"{name:<28} {results[name]['seconds'] * 1e3:11.3f} ms", flush=True)
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """Return a list of human-readable regressions against the baseline stages"""
+    regressions = []
+    time_threshold = threshold * host_slowdown(results, baseline)
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if name != CALIBRATION_STAGE and is_slower(current['seconds'], base['seconds'], time_threshold):
+            regressions.append(f"{name}: {current['seconds'] * 1e3:.3f} ms vs baseline {base['seconds'] * 1e3:.3f} ms")
+        if base['peak_bytes'] and current['peak_bytes'] > base['peak_bytes'] * memory_threshold:
+            regressions.append(f"{name}: peak {current['peak_bytes'] / 1e6:.2f} MB vs baseline {base['peak_bytes'] / 1e6:.2f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    parser.add_argument("--quick", action="store_true", help="only batch sizes up to 1,000")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over all stages (default: %(default)s)")
+    parser.add_argument("--threshold", type=float, default=1.5, help="allowed slowdown factor (default: %(default)s)")
+    parser.add_argument("--memory-threshold", type=float, default=1.5, help="allowed peak memory factor (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    key = 'quick_stages' if args.quick else 'stages'
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    measured = list(stages(args.model, QUICK_BATCH_SIZES if args.quick else BATCH_SIZES))
+    results = run(measured, args.rounds)
+    if not args.update_baseline and key in baseline:
+        retime_slower(measured, results, baseline[key], args.threshold)
+    for name, ratio in explain_ratios(results).items():
+        print(f"{name} takes {ratio:.1f}x {EXPLAIN_RATIOS[name]}")
+    document = {'environment': environment(), key: results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2)
+    if args.update_baseline:
+        # Keep the other mode's stages
+        with open(args.baseline, 'w') as f:
+            json.dump({**baseline, **document}, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if key not in baseline:
+        print(f"No {'--quick ' if args.quick else ''}baseline in {args.baseline}; "
+              f"run with {'--quick ' if args.quick else ''}--update-baseline first")
+        return 0
+
+    recorded = baseline.get('environment', {})
+    if recorded.get('platform') != document['environment']['platform']:
+        print(f"Note: baseline was recorded on {recorded.get('platform')}; timings may not be comparable")
+    slowdown = host_slowdown(results, baseline[key])
+    if slowdown > 1.05:
+        measured_slowdown = results[CALIBRATION_STAGE]['seconds'] / baseline[key][CALIBRATION_STAGE]['seconds']
+        print(f"Note: the host ran {measured_slowdown:.2f}x slower than when the baseline was recorded "
+              f"({CALIBRATION_STAGE}); allowing {args.threshold * slowdown:.2f}x")
+    regressions = compare(results, baseline[key], args.threshold, args.memory_threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"All {len(results)} stages within {args.threshold}x of the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared inference code for the GradePath student achievement predictor."""
@@ -0,0 +1,302 @@
+"""Cohort analytics: pre-aggregated grade distributions and their charts.
+
+A scored roster is reduced once to fixed-size aggregates: predicted-G3
+histograms in half-point bins per group, per-group sums, and a studytime x
+absences grid. It can be fed chunk by chunk, so 100k+ students never need to
+sit in memory. The charts are drawn from those aggregates only, never from
+individual students, so rendering cost does not grow with the cohort. The
+aggregates and the rendered PNGs are cached per dataset digest and shared by
+every session. matplotlib and seaborn are imported only when a chart is first
+drawn.
+"""
+import collections
+import hashlib
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+
+from gradepath.recommendations import GRADE_BANDS
+from gradepath.schema import CATEGORICAL_VALUES
+
+
+BIN_WIDTH = 0.5
+BIN_EDGES = np.arange(0, 20 + BIN_WIDTH, BIN_WIDTH)
+N_BINS = len(BIN_EDGES) - 1
+
+# (lower bound inclusive, label)
+ABSENCE_BUCKETS = [(0, '0'), (1, '1-3'), (4, '4-9'), (10, '10-19'), (20, '20+')]
+
+STUDYTIME_LABELS = {1: '<2 h', 2: '2-5 h', 3: '5-10 h', 4: '>10 h'}
+
+# Dimension -> (title, group labels)
+DIMENSIONS = {
+    'school': ('School', list(CATEGORICAL_VALUES['school'])),
+    'studytime': ('Weekly study time', list(STUDYTIME_LABELS.values())),
+    'absences': ('Absences', [label for _, label in ABSENCE_BUCKETS]),
+    'grade_level': ('Grade band', [level for _, level, _ in GRADE_BANDS]),
+}
+
+SUMMARY_COLUMNS = ['school', 'studytime', 'absences', 'predicted_G3']
+
+
+def _group_codes(dimension, scored):
+    """Return each row's group index for a dimension, -1 where the value is outside the groups"""
+    if dimension == 'school':
+        codes = pd.Categorical(scored['school'], categories=DIMENSIONS['school'][1]).codes
+    elif dimension == 'studytime':
+        values = np.asarray(scored['studytime'], dtype=np.int64)
+        codes = np.where((values >= 1) & (values <= 4), values - 1, -1)
+    elif dimension == 'absences':
+        lows = [low for low, _ in ABSENCE_BUCKETS]
+        codes = np.searchsorted(lows, np.asarray(scored['absences'], dtype=np.int64), side='right') - 1
+    else:
+        uppers = [upper for upper, _, _ in GRADE_BANDS[:-1]]
+        codes = np.searchsorted(uppers, np.asarray(scored['predicted_G3'], dtype=np.float64), side='right')
+    return np.asarray(codes, dtype=np.int64)
+
+
+def _bins(predictions):
+    return np.clip((np.asarray(predictions, dtype=np.float64) / BIN_WIDTH).astype(np.int64), 0, N_BINS - 1)
+
+
+class CohortAggregator:
+    """Running histograms and sums of predicted G3 per group; update() with scored chunks"""
+
+    def __init__(self):
+        self.rows = 0
+        self.counts = {d: np.zeros((len(groups), N_BINS), dtype=np.int64) for d, (_, groups) in DIMENSIONS.items()}
+        self.sums = {d: np.zeros(len(groups)) for d, (_, groups) in DIMENSIONS.items()}
+        n_study, n_absent = len(STUDYTIME_LABELS), len(ABSENCE_BUCKETS)
+        self.grid_sum = np.zeros((n_study, n_absent))
+        self.grid_count = np.zeros((n_study, n_absent), dtype=np.int64)
+
+    def update(self, scored):
+        """Add a scored frame with school, studytime, absences and predicted_G3 columns"""
+        if not len(scored):
+            return self
+        predictions = np.asarray(scored['predicted_G3'], dtype=np.float64)
+        bins = _bins(predictions)
+        codes = {}
+        for dimension, counts in self.counts.items():
+            code = codes[dimension] = _group_codes(dimension, scored)
+            keep = code >= 0
+            n_groups = counts.shape[0]
+            counts += np.bincount(code[keep] * N_BINS + bins[keep], minlength=n_groups * N_BINS).reshape(n_groups, N_BINS)
+            self.sums[dimension] += np.bincount(code[keep], weights=predictions[keep], minlength=n_groups)
+        study, absent = codes['studytime'], codes['absences']
+        keep = (study >= 0) & (absent >= 0)
+        cell = study[keep] * self.grid_sum.shape[1] + absent[keep]
+        self.grid_sum += np.bincount(cell, weights=predictions[keep], minlength=self.grid_sum.size).reshape(self.grid_sum.shape)
+        self.grid_count += np.bincount(cell, minlength=self.grid_count.size).reshape(self.grid_count.shape)
+        self.rows += len(scored)
+        return self
+
+    def histogram(self):
+        """Return the cohort's predicted-G3 counts per half-point bin, split by grade band (bands x bins)"""
+        return self.counts['grade_level']
+
+    def quantiles(self, dimension, qs=(0.25, 0.5, 0.75)):
+        """Return (groups x len(qs)) quantiles read from the histograms, accurate to one bin"""
+        counts = self.counts[dimension]
+        cumulative = np.cumsum(counts, axis=1)
+        totals = cumulative[:, -1:]
+        result = np.full((counts.shape[0], len(qs)), np.nan)
+        for j, q in enumerate(qs):
+            target = q * totals[:, 0]
+            index = np.minimum((cumulative < target[:, None]).sum(axis=1), N_BINS - 1)
+            before = np.where(index > 0, cumulative[np.arange(len(index)), index - 1], 0)
+            inside = counts[np.arange(len(index)), index]
+            fraction = np.divide(target - before, inside, out=np.zeros(len(index)), where=inside > 0)
+            result[:, j] = np.where(totals[:, 0] > 0, BIN_EDGES[index] + fraction * BIN_WIDTH, np.nan)
+        return result
+
+    def group_table(self, dimension):
+        """Return students, mean, quartiles and band shares of predicted G3 per group"""
+        title, groups = DIMENSIONS[dimension]
+        counts = self.counts[dimension]
+        students = counts.sum(axis=1)
+        quartiles = self.quantiles(dimension)
+        table = pd.DataFrame({
+            title: groups,
+            'Students': students,
+            'Mean G3': np.divide(self.sums[dimension], students, out=np.full(len(groups), np.nan), where=students > 0),
+            'Lower quartile': quartiles[:, 0],
+            'Median': quartiles[:, 1],
+            'Upper quartile': quartiles[:, 2],
+        })
+        # Band edges fall on bin edges, so band shares are exact
+        band_rows = _group_codes('grade_level', pd.DataFrame({'predicted_G3': BIN_EDGES[:-1]}))
+        for b, (_, level, _) in enumerate(GRADE_BANDS):
+            in_band = counts[:, band_rows == b].sum(axis=1)
+            table[f"% {level}"] = np.divide(100.0 * in_band, students, out=np.zeros(len(groups)), where=students > 0)
+        return table
+
+    def mean_grid(self):
+        """Return mean predicted G3 by studytime (rows) and absences bucket (columns)"""
+        means = np.divide(self.grid_sum, self.grid_count, out=np.full(self.grid_sum.shape, np.nan), where=self.grid_count > 0)
+        return pd.DataFrame(means, index=list(STUDYTIME_LABELS.values()), columns=[label for _, label in ABSENCE_BUCKETS])
+
+    def overview(self):
+        """Return headline numbers: students, mean predicted G3 and the share in each band"""
+        bands = self.counts['grade_level'].sum(axis=1)
+        total = max(self.rows, 1)
+        return {
+            'students': self.rows,
+            'mean': float(self.sums['grade_level'].sum() / total),
+            'bands': {level: float(bands[b] / total) for b, (_, level, _) in enumerate(GRADE_BANDS)},
+        }
+
+
+def dataset_digest(scored):
+    """Return a content hash of the columns the dashboard reads"""
+    hashed = pd.util.hash_pandas_object(scored[SUMMARY_COLUMNS], index=False)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()[:16]
+
+
+def _new_figure(width=6.4, height=3.6):
+    # Figure objects, not pyplot: no global state, safe on Streamlit's script threads
+    from matplotlib.figure import Figure
+
+    return Figure(figsize=(width, height), dpi=110, layout='constrained')
+
+
+def _png(figure):
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+def plot_distribution(aggregator):
+    """Stacked histogram of predicted G3, colored by grade band"""
+    figure = _new_figure()
+    ax = figure.add_subplot()
+    bottom = np.zeros(N_BINS)
+    for b, (_, level, color) in enumerate(GRADE_BANDS):
+        counts = aggregator.histogram()[b]
+        ax.bar(BIN_EDGES[:-1], counts, width=BIN_WIDTH, bottom=bottom, align='edge', color=color, label=level)
+        bottom += counts
+    ax.set_xlabel('Predicted final grade (G3)')
+    ax.set_ylabel('Students')
+    ax.set_xlim(0, 20)
+    ax.legend(frameon=False, fontsize='small')
+    return _png(figure)
+
+
+def plot_groups(aggregator, dimension):
+    """Box plot of predicted G3 per group, drawn from histogram quantiles"""
+    title, groups = DIMENSIONS[dimension]
+    q = aggregator.quantiles(dimension, (0.1, 0.25, 0.5, 0.75, 0.9))
+    table = aggregator.group_table(dimension)
+    stats = [
+        {'label': f"{group}\n(n={n:,})", 'whislo': row[0], 'q1': row[1], 'med': row[2], 'q3': row[3], 'whishi': row[4],
+         'mean': mean}
+        for group, n, row, mean in zip(groups, table['Students'], q, table['Mean G3']) if n
+    ]
+    figure = _new_figure()
+    ax = figure.add_subplot()
+    if stats:
+        ax.bxp(stats, showfliers=False, showmeans=True, patch_artist=True,
+               boxprops={'facecolor': '#c7d2fe', 'edgecolor': '#4338ca'}, medianprops={'color': '#1e1b4b'})
+    ax.set_ylabel('Predicted G3')
+    ax.set_ylim(0, 20)
+    ax.set_title(f"By {title.lower()} (whiskers: 10th-90th percentile)", fontsize='medium')
+    return _png(figure)
+
+
+def plot_grid(aggregator):
+    """Heatmap of mean predicted G3 by study time and absences"""
+    import seaborn as sns
+
+    figure = _new_figure()
+    ax = figure.add_subplot()
+    sns.heatmap(aggregator.mean_grid(), ax=ax, annot=True, fmt='.1f', cmap='RdYlGn', vmin=0, vmax=20,
+                cbar_kws={'label': 'Mean predicted G3'})
+    ax.set_xlabel('Absences')
+    ax.set_ylabel('Weekly study time')
+    return _png(figure)
+
+
+CHARTS = {
+    'distribution': plot_distribution,
+    'school': lambda aggregator: plot_groups(aggregator, 'school'),
+    'studytime': lambda aggregator: plot_groups(aggregator, 'studytime'),
+    'absences': lambda aggregator: plot_groups(aggregator, 'absences'),
+    'grid': plot_grid,
+}
+
+
+class CohortCache:
+    """LRU of aggregated cohorts and their rendered charts, keyed by dataset digest"""
+
+    def __init__(self, maxsize=8):
+        self.maxsize = maxsize
+        self._cohorts = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached aggregator for key, or None"""
+        with self._lock:
+            entry = self._cohorts.get(key)
+            if entry is None:
+                return None
+            self._cohorts.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, aggregator):
+        with self._lock:
+            self._cohorts[key] = (aggregator, {})
+            self._cohorts.move_to_end(key)
+            while len(self._cohorts) > self.maxsize:
+                self._cohorts.popitem(last=False)
+        return aggregator
+
+    def aggregate(self, key, scored_chunks):
+        """Return the aggregator for key, building it from scored chunks only on a miss"""
+        aggregator = self.get(key)
+        if aggregator is None:
+            aggregator = CohortAggregator()
+            for scored in scored_chunks:
+                aggregator.update(scored)
+            self.put(key, aggregator)
+        return aggregator
+
+    def chart(self, key, name, aggregator=None):
+        """Return the PNG for one chart, rendering it at most once per cohort"""
+        with self._lock:
+            entry = self._cohorts.get(key)
+        if entry is None:
+            if aggregator is None:
+                raise KeyError(key)
+            self.put(key, aggregator)
+            with self._lock:
+                entry = self._cohorts[key]
+        aggregator, charts = entry
+        png = charts.get(name)
+        if png is None:
+            # One render at a time, so concurrent sessions never draw the same chart twice
+            with self._render_lock:
+                png = charts.get(name)
+                if png is None:
+                    png = charts[name] = CHARTS[name](aggregator)
+        return png
+
+    def clear(self):
+        with self._lock:
+            self._cohorts.clear()
+
+
+_cohort_cache = None
+_cohort_cache_lock = threading.Lock()
+
+
+def get_cohort_cache():
+    """Return the cohort cache shared by every session in this process"""
+    global _cohort_cache
+    if _cohort_cache is None:
+        with _cohort_cache_lock:
+            if _cohort_cache is None:
+                _cohort_cache = CohortCache()
+    return _cohort_cache
@@ -0,0 +1,311 @@
+"""HTTP/JSON prediction service (ASGI) sharing the app's model and recommendation rules.
+
+Concurrent single-student requests are collected into micro-batches, closed
+after ``GRADEPATH_MAX_WAIT_MS`` milliseconds or ``GRADEPATH_MAX_BATCH`` rows,
+and each batch is scored with one vectorized predict call.
+
+    python -m gradepath.api --port 8000
+    uvicorn gradepath.api:app --port 8000
+
+Endpoints:
+    POST /predict        one student object -> prediction, grade band, recommendations
+    POST /predict/batch  list of up to GRADEPATH_MAX_BATCH_ROWS (10,000) student objects, scored in one call
+    POST /export         CSV or Parquet roster body -> streamed tar.gz (default) or ZIP of per-student reports
+    GET  /health         liveness
+    GET  /ready          200 with the startup breakdown once warm-up finished, else 503
+    GET  /metrics        Prometheus text (when GRADEPATH_METRICS=1)
+
+/export takes ``?format=tar.gz|zip&type=csv|parquet&id_column=...``. tar.gz
+keeps memory constant whatever the cohort size. ``format=zip`` holds the
+archive's central directory in memory, about half a kilobyte per student.
+
+Larger /predict/batch requests get 413 before their body is parsed; parsing,
+validation and scoring run on worker threads, so a big batch never stalls the
+event loop serving everyone else.
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from gradepath import audit, metrics, warmup
+from gradepath.batch import read_roster, score_chunks
+from gradepath.export import ARCHIVE_TYPES, iter_archive
+from gradepath.recommendations import RULE_FIELDS, recommend_batch
+from gradepath.registry import get_registry
+from gradepath.schema import validate_record
+
+
+# Upper bound on the JSON size of one student, used to reject oversized bodies unread
+MAX_RECORD_BYTES = 2048
+
+
+class Overloaded(Exception):
+    """Raised when the batching queue is full"""
+
+
+def predict_batch(records):
+    """Score a list of validated input_dicts in one call; returns one result dict per record"""
+    start = time.perf_counter()
+    registry = get_registry()
+    with metrics.stage('api_predict'):
+        predictions = registry.predict_records(records)
+    with metrics.stage('api_recommendations'):
+        columns = {field: [record[field] for record in records] for field in RULE_FIELDS}
+        recommendations, levels, colors = recommend_batch(columns, predictions)
+    metrics.inc('gradepath_predictions_total', len(records), source='api')
+    version = registry.version
+    audit.record(records, predictions, levels, version, time.perf_counter() - start, 'api')
+    return [
+        {
+            'predicted_G3': float(prediction),
+            'grade_level': str(level),
+            'grade_color': str(color),
+            'recommendations': recs,
+            'model_version': version,
+        }
+        for prediction, level, color, recs in zip(predictions, levels, colors, recommendations)
+    ]
+
+
+class MicroBatcher:
+    """Groups concurrent submissions into batches for one predict call each.
+
+    A batch closes when it holds ``max_batch`` records or ``max_wait`` seconds
+    after its first record arrived. Scoring runs on a worker thread, so the
+    next batch fills while the current one is being scored. At most
+    ``max_queue`` records wait at once; beyond that submissions fail fast
+    with Overloaded to keep tail latency bounded.
+    """
+
+    def __init__(self, predict_batch=predict_batch, max_batch=64, max_wait=0.005, max_queue=2048):
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._queue = None
+        self._task = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="gradepath-batcher")
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, record):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((record, future))
+        except asyncio.QueueFull:
+            raise Overloaded() from None
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Requests whose client went away are not worth scoring
+            batch = [(record, future) for record, future in batch if not future.done()]
+            if not batch:
+                continue
+            metrics.observe('gradepath_api_batch_size', len(batch))
+            try:
+                results = await loop.run_in_executor(self._executor, self.predict_batch, [r for r, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+def _export_stream(spool, roster_type, id_column):
+    """Score a spooled roster and yield the report archive, closing the spool when done"""
+    try:
+        registry = get_registry()
+        scored_chunks = score_chunks(registry.predictor(), read_roster(spool, roster_type), id_column)
+        for scored, rejected, errors in audit.record_chunks(scored_chunks, registry.version, 'export'):
+            metrics.inc('gradepath_predictions_total', len(scored), source='export')
+            yield scored, rejected, errors
+    finally:
+        spool.close()
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+async def _read_body(request, limit):
+    """Return the request body, or None as soon as it is known to exceed limit bytes"""
+    length = request.headers.get('content-length', '')
+    if length.isdigit() and int(length) > limit:
+        return None
+    chunks, size = [], 0
+    async for data in request.stream():
+        size += len(data)
+        if size > limit:
+            return None
+        chunks.append(data)
+    return b''.join(chunks)
+
+
+def _parse_batch(body, max_rows):
+    """Decode and validate a /predict/batch body; returns (records, status, errors)"""
+    try:
+        records = json.loads(body)
+    except ValueError:
+        records = None
+    if not isinstance(records, list) or not records:
+        return None, 422, ["Request body must be a non-empty JSON list of students"]
+    if len(records) > max_rows:
+        return None, 413, [f"At most {max_rows:,} students per request"]
+    problems = {i: p for i, p in ((i, validate_record(r)) for i, r in enumerate(records)) if p}
+    if problems:
+        return None, 422, problems
+    return records, 200, None
+
+
+def create_app(max_batch=None, max_wait_ms=None, max_queue=None, max_rows=None):
+    """Build the ASGI application; defaults come from GRADEPATH_MAX_BATCH / _MAX_WAIT_MS / _MAX_QUEUE / _MAX_BATCH_ROWS"""
+    max_rows = max_rows or int(os.environ.get('GRADEPATH_MAX_BATCH_ROWS', 10_000))
+    batcher = MicroBatcher(
+        max_batch=max_batch or int(os.environ.get('GRADEPATH_MAX_BATCH', 64)),
+        max_wait=(max_wait_ms if max_wait_ms is not None else float(os.environ.get('GRADEPATH_MAX_WAIT_MS', 5))) / 1000,
+        max_queue=max_queue or int(os.environ.get('GRADEPATH_MAX_QUEUE', 2048)),
+    )
+
+    async def predict(request):
+        record = await _json_body(request)
+        problems = validate_record(record) if record is not None else ["Request body must be JSON"]
+        if problems:
+            return JSONResponse({'errors': problems}, status_code=422)
+        try:
+            with metrics.stage('api_request'):
+                result = await batcher.submit(record)
+        except Overloaded:
+            return JSONResponse({'errors': ["Server is overloaded, retry shortly"]}, status_code=503,
+                                headers={'Retry-After': '1'})
+        return JSONResponse(result)
+
+    async def predict_many(request):
+        body = await _read_body(request, max_rows * MAX_RECORD_BYTES)
+        if body is None:
+            return JSONResponse({'errors': [f"At most {max_rows:,} students per request"]}, status_code=413)
+        records, status, errors = await run_in_threadpool(_parse_batch, body, max_rows)
+        if errors:
+            return JSONResponse({'errors': errors}, status_code=status)
+        results = await asyncio.get_running_loop().run_in_executor(None, predict_batch, records)
+        return JSONResponse(results)
+
+    async def export(request):
+        fmt = request.query_params.get('format', 'tar.gz')
+        roster_type = request.query_params.get('type', 'csv')
+        if fmt not in ARCHIVE_TYPES or roster_type not in ('csv', 'parquet'):
+            return JSONResponse({'errors': ["format must be tar.gz or zip and type csv or parquet"]}, status_code=422)
+        # Large uploads spill to disk instead of staying in memory
+        spool = tempfile.SpooledTemporaryFile(max_size=8 << 20)
+        async for data in request.stream():
+            # Past max_size every write goes to disk
+            await run_in_threadpool(spool.write, data)
+        spool.seek(0)
+        id_column = request.query_params.get('id_column')
+        body = iter_archive(_export_stream(spool, roster_type, id_column), fmt, id_column)
+        try:
+            # Scoring the first chunk surfaces missing columns before the response starts
+            first = await run_in_threadpool(next, body)
+        except (ValueError, KeyError) as e:
+            body.close()
+            return JSONResponse({'errors': [str(e)]}, status_code=422)
+        name = 'gradepath_reports.zip' if fmt == 'zip' else 'gradepath_reports.tar.gz'
+        return StreamingResponse(itertools.chain([first], body), media_type=ARCHIVE_TYPES[fmt],
+                                 headers={'Content-Disposition': f'attachment; filename="{name}"'})
+
+    async def health(request):
+        return JSONResponse({'status': 'ok'})
+
+    async def ready(request):
+        report = warmup.startup_report()
+        return JSONResponse(report, status_code=200 if report['ready'] else 503)
+
+    async def metrics_text(request):
+        return PlainTextResponse(metrics.METRICS.render(), media_type='text/plain; version=0.0.4')
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        # Load and exercise the model before the server accepts traffic; explanations are not served here
+        await asyncio.get_running_loop().run_in_executor(None, warmup.warm_up, False)
+        await batcher.start()
+        yield
+        await batcher.stop()
+
+    routes = [
+        Route('/predict', predict, methods=['POST']),
+        Route('/predict/batch', predict_many, methods=['POST']),
+        Route('/export', export, methods=['POST']),
+        Route('/health', health),
+        Route('/ready', ready),
+        Route('/metrics', metrics_text),
+    ]
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.batcher = batcher
+    return app
+
+
+app = create_app()
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m gradepath.api", description="Serve GradePath predictions over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=None, help="rows per micro-batch (default: 64)")
+    parser.add_argument("--max-wait-ms", type=float, default=None, help="batch collection window (default: 5)")
+    parser.add_argument("--max-batch-rows", type=int, default=None, help="students per /predict/batch request (default: 10000)")
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(args.max_batch, args.max_wait_ms, max_rows=args.max_batch_rows), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
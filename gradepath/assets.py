@@ -0,0 +1,105 @@
+"""Resized, recompressed variants of the welcome-page background image.
+
+Variants are written once into the app's ``static/`` folder under
+content-hashed names, so Streamlit can serve them as ordinary static files
+(``server.enableStaticServing``) and browsers can keep them cached: a new
+image gets a new URL.
+
+    python -m gradepath.assets    # prebuild the variants, e.g. in a container image
+"""
+import base64
+import functools
+import os
+import sys
+
+from gradepath.registry import file_digest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKGROUND_IMAGE = os.path.join(ROOT, '1 (2).png')
+STATIC_DIR = os.path.join(ROOT, 'static')
+STATIC_URL = 'app/static'
+
+WIDTHS = (768, 1152, 1536)
+# format name -> (file extension, MIME type, Pillow save options)
+FORMATS = {
+    'WEBP': ('webp', 'image/webp', {'quality': 80, 'method': 6}),
+    'JPEG': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def build_variants(source=BACKGROUND_IMAGE, out_dir=STATIC_DIR, widths=WIDTHS):
+    """Write missing resized variants of source; returns {(format, width): file name}"""
+    from PIL import Image
+
+    digest = file_digest(source)[:12]
+    os.makedirs(out_dir, exist_ok=True)
+
+    variants = {}
+    image = None
+    for fmt, (ext, _, options) in FORMATS.items():
+        for width in widths:
+            name = f"bg-{digest}-{width}.{ext}"
+            variants[(fmt, width)] = name
+            path = os.path.join(out_dir, name)
+            if os.path.exists(path):
+                continue
+            if image is None:
+                image = Image.open(source).convert('RGB')
+            target = min(width, image.width)
+            resized = image.resize((target, round(image.height * target / image.width)), Image.LANCZOS)
+            # Write under a temporary name so concurrent processes never serve a partial file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            resized.save(tmp_path, fmt, **options)
+            os.replace(tmp_path, path)
+    return variants
+
+
+def _url(name):
+    return f"{STATIC_URL}/{name}"
+
+
+def _image_set(variants, width):
+    sources = ', '.join(
+        f'url("{_url(variants[(fmt, width)])}") type("{mime}")' for fmt, (_, mime, _) in FORMATS.items()
+    )
+    return f"image-set({sources})"
+
+
+@functools.lru_cache(maxsize=None)
+def background_css(selector='.stApp', static_serving=True):
+    """Return the CSS rules that set the background, built once per process.
+
+    With static serving the stylesheet only references the variants (the
+    browser picks WebP or JPEG at the width matching the viewport); without
+    it the smallest JPEG is inlined as a data URI instead of the original PNG.
+    """
+    variants = build_variants()
+    widths = sorted({width for _, width in variants})
+    if not static_serving:
+        with open(os.path.join(STATIC_DIR, variants[('JPEG', widths[0])]), 'rb') as f:
+            encoded = base64.b64encode(f.read()).decode()
+        return f"{selector} {{ background: url('data:image/jpeg;base64,{encoded}') center center/cover no-repeat !important; }}"
+
+    rules = []
+    for i, width in enumerate(widths):
+        fallback = f'url("{_url(variants[("JPEG", width)])}")'
+        body = (f"{selector} {{ background: {fallback} center center/cover no-repeat !important; "
+                f"background-image: {_image_set(variants, width)} !important; }}")
+        if i == 0:
+            rules.append(body)
+        else:
+            # Use the next size up once the viewport is wider than the previous variant
+            rules.append(f"@media (min-width: {widths[i - 1] + 1}px) {{ {body} }}")
+    return '\n'.join(rules)
+
+
+def main():
+    for (fmt, width), name in sorted(build_variants().items()):
+        size = os.path.getsize(os.path.join(STATIC_DIR, name))
+        print(f"{fmt:<5} {width:>5}px  {size / 1024:8.1f} KB  static/{name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,420 @@
+"""Append-only prediction audit log in Arrow IPC segments, written by a background thread.
+
+Every served prediction's inputs, predicted G3, grade level, model version and
+latency are recorded. The request path only appends to an in-memory list. A
+writer thread converts what accumulated into one Arrow record batch every
+``GRADEPATH_AUDIT_BATCH`` rows or ``GRADEPATH_AUDIT_FLUSH_SECONDS``, and
+appends it to the current segment. Nothing is recorded unless
+``GRADEPATH_AUDIT=1``. Configuration:
+
+    GRADEPATH_AUDIT=1                     record predictions
+    GRADEPATH_AUDIT_DIR=audit             segment directory
+    GRADEPATH_AUDIT_BATCH=1024            rows that trigger an early flush
+    GRADEPATH_AUDIT_FLUSH_SECONDS=1       longest a row waits in memory
+    GRADEPATH_AUDIT_SEGMENT_MB=64         rotate the open segment at this size...
+    GRADEPATH_AUDIT_SEGMENT_SECONDS=3600  ...or at this age
+
+Segments are named ``<writer>-<first>-<last>`` with a sequence range. The open
+one is an IPC stream (``.arrows``), readable up to its last complete batch.
+After a rotation, runs of small sealed segments are compacted into one IPC
+file (``.arrow``) covering their whole range. Readers skip segments whose
+range another file already covers, so a query never counts a row twice, even
+mid-compaction. Segments are uncompressed so query() can memory-map them
+without copying.
+
+    python -m gradepath.audit --since 2026-01-01        # daily summary per model version and source
+    python -m gradepath.audit --output audit.parquet    # export the log
+"""
+import argparse
+import atexit
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+from gradepath import metrics
+from gradepath.schema import CATEGORICAL_VALUES, FEATURE_COLUMNS
+
+
+SEGMENT_PATTERN = re.compile(r'^(?P<writer>[0-9a-f]+)-(?P<first>\d+)-(?P<last>\d+)\.(?P<ext>arrows|arrow)$')
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name):
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def schema():
+    """Return the Arrow schema of an audit record"""
+    import pyarrow as pa
+
+    fields = [
+        pa.field('ts', pa.timestamp('us', tz='UTC')),
+        pa.field('source', pa.string()),
+        pa.field('model_version', pa.string()),
+        pa.field('latency_ms', pa.float64()),
+        pa.field('cached', pa.bool_()),
+        pa.field('predicted_G3', pa.float64()),
+        pa.field('grade_level', pa.string()),
+    ]
+    fields += [pa.field(c, pa.string() if c in CATEGORICAL_VALUES else pa.int16()) for c in FEATURE_COLUMNS]
+    return pa.schema(fields)
+
+
+def list_segments(directory):
+    """Return live segment paths in sequence order, skipping ranges a compacted file already covers"""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    found = []
+    for name in names:
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            found.append((match['writer'], int(match['first']), int(match['last']), name))
+    live = [
+        (writer, first, last, name) for writer, first, last, name in found
+        if not any(w == writer and f <= first and last <= l and (f, l) != (first, last) for w, f, l, _ in found)
+    ]
+    return [os.path.join(directory, name) for _, _, _, name in sorted(live)]
+
+
+def read_segment(path):
+    """Return the record batches of one segment, memory-mapped; a torn last batch is ignored"""
+    import pyarrow as pa
+
+    source = pa.memory_map(path)
+    if path.endswith('.arrow'):
+        reader = pa.ipc.open_file(source)
+        return [reader.get_batch(i) for i in range(reader.num_record_batches)]
+    batches = []
+    try:
+        reader = pa.ipc.open_stream(source)
+        for batch in reader:
+            batches.append(batch)
+    except (pa.ArrowInvalid, OSError):
+        # The writer may be in the middle of appending to the open segment
+        pass
+    return batches
+
+
+class AuditLog:
+    """Buffers prediction records and appends them to rotating Arrow IPC segments on a writer thread"""
+
+    def __init__(self, directory, batch_rows=1024, flush_interval=1.0, segment_bytes=64 << 20,
+                 segment_seconds=3600.0, max_pending_rows=100_000, compact_min=4):
+        self.directory = directory
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.max_pending_rows = max_pending_rows
+        self.compact_min = compact_min
+        self.writer_id = uuid.uuid4().hex[:12]
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._schema = None
+        self._sequence = 0
+        self._segment = None  # (path, sink, writer, opened_at)
+
+    def record(self, rows, predictions, grade_levels, model_version, latency, source, cached=False):
+        """Queue predictions for the log without touching disk.
+
+        ``rows`` is an input_dict, a list of them or a DataFrame with the form's
+        columns. ``latency`` is the seconds spent producing these predictions.
+        """
+        if hasattr(rows, 'keys') and not hasattr(rows, 'columns'):
+            rows = [rows]
+        n = len(rows)
+        entry = (time.time(), rows, predictions, grade_levels, model_version, latency, source, cached)
+        with self._lock:
+            if self._pending_rows + n > self.max_pending_rows:
+                # The writer fell behind; never let the request path wait for it
+                self.rows_dropped += n
+                dropped = True
+            else:
+                self._pending.append(entry)
+                self._pending_rows += n
+                dropped = False
+            full = self._pending_rows >= self.batch_rows
+        if dropped:
+            metrics.inc('gradepath_audit_rows_total', n, result='dropped')
+            return
+        self._start()
+        if full:
+            self._wake.set()
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="gradepath-audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit log flush failed")
+
+    def _to_batch(self, entries):
+        import numpy as np
+        import pyarrow as pa
+
+        columns = {name: [] for name in self._schema.names}
+        for ts, rows, predictions, levels, version, latency, source, cached in entries:
+            n = len(rows)
+            columns['ts'].append(np.full(n, int(ts * 1e6), dtype=np.int64))
+            columns['source'].append([source] * n)
+            columns['model_version'].append([version] * n)
+            columns['latency_ms'].append(np.full(n, latency * 1e3))
+            columns['cached'].append(np.full(n, bool(cached)))
+            columns['predicted_G3'].append(np.asarray(predictions, dtype=np.float64))
+            columns['grade_level'].append([str(level) for level in levels])
+            for c in FEATURE_COLUMNS:
+                columns[c].append(list(rows[c]) if hasattr(rows, 'columns') else [row[c] for row in rows])
+        arrays = []
+        for field in self._schema:
+            parts = columns[field.name]
+            if isinstance(parts[0], np.ndarray):
+                values = np.concatenate(parts)
+            else:
+                values = [value for part in parts for value in part]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def flush(self):
+        """Write everything queued so far, rotating the segment when it is too large or too old"""
+        with self._write_lock:
+            with self._lock:
+                entries, self._pending, self._pending_rows = self._pending, [], 0
+            if entries:
+                start = time.perf_counter()
+                if self._schema is None:
+                    self._schema = schema()
+                batch = self._to_batch(entries)
+                _, sink, writer, _ = self._open_segment()
+                writer.write_batch(batch)
+                sink.flush()
+                self.rows_written += batch.num_rows
+                metrics.inc('gradepath_audit_rows_total', batch.num_rows, result='written')
+                metrics.observe('gradepath_audit_flush_seconds', time.perf_counter() - start)
+            if self._segment is not None:
+                path, sink, _, opened_at = self._segment
+                if sink.tell() >= self.segment_bytes or time.time() - opened_at >= self.segment_seconds:
+                    self._rotate()
+
+    def _open_segment(self):
+        import pyarrow as pa
+
+        if self._segment is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._sequence += 1
+            path = os.path.join(self.directory, f"{self.writer_id}-{self._sequence:06d}-{self._sequence:06d}.arrows")
+            sink = pa.OSFile(path, 'wb')
+            self._segment = (path, sink, pa.ipc.new_stream(sink, self._schema), time.time())
+        return self._segment
+
+    def _rotate(self):
+        path, sink, writer, _ = self._segment
+        self._segment = None
+        writer.close()
+        sink.close()
+        logger.info("Sealed audit segment %s", path)
+        self.compact()
+
+    def compact(self):
+        """Merge runs of this writer's small sealed segments into IPC files; returns the files written"""
+        import pyarrow as pa
+
+        active = self._segment[0] if self._segment is not None else None
+        own = []
+        for path in list_segments(self.directory):
+            match = SEGMENT_PATTERN.match(os.path.basename(path))
+            if match['writer'] == self.writer_id and path != active:
+                own.append((int(match['first']), int(match['last']), path, os.path.getsize(path)))
+
+        # Consecutive small segments only, so a merged range never covers a segment it did not absorb
+        runs, run, run_bytes = [], [], 0
+        for first, last, path, size in own:
+            small = size < self.segment_bytes // 2
+            if run and (not small or run_bytes + size > self.segment_bytes or first != run[-1][1] + 1):
+                runs.append(run)
+                run, run_bytes = [], 0
+            if small:
+                run.append((first, last, path, size))
+                run_bytes += size
+        if run:
+            runs.append(run)
+
+        written = []
+        for run in runs:
+            if len(run) < self.compact_min:
+                continue
+            batches = [batch for _, _, path, _ in run for batch in read_segment(path)]
+            if not batches:
+                continue
+            table = pa.Table.from_batches(batches).combine_chunks()
+            target = os.path.join(self.directory, f"{self.writer_id}-{run[0][0]:06d}-{run[-1][1]:06d}.arrow")
+            with pa.OSFile(target + '.tmp', 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            # The covering file appears before its parts go away; readers skip the parts meanwhile
+            os.replace(target + '.tmp', target)
+            for _, _, path, _ in run:
+                os.remove(path)
+            written.append(target)
+            logger.info("Compacted %d audit segments into %s", len(run), target)
+        return written
+
+    def close(self):
+        """Flush, seal the open segment and stop the writer thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self.flush()
+        with self._write_lock:
+            if self._segment is not None:
+                self._rotate()
+
+    def stats(self):
+        return {
+            'directory': self.directory,
+            'rows_written': self.rows_written,
+            'rows_dropped': self.rows_dropped,
+            'pending_rows': self._pending_rows,
+        }
+
+
+def query(directory=None, columns=None, since=None, until=None):
+    """Return the log as a pyarrow Table, optionally only some columns and a [since, until) time range.
+
+    Segments are memory-mapped, so columns that are not selected are never read
+    from disk.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    directory = directory or DIRECTORY
+    wanted = None if columns is None else list(dict.fromkeys(['ts', *columns]))
+    batches = []
+    for path in list_segments(directory):
+        for batch in read_segment(path):
+            batches.append(batch.select(wanted) if wanted else batch)
+    if not batches:
+        empty = schema()
+        return empty.empty_table().select(wanted) if wanted else empty.empty_table()
+    table = pa.Table.from_batches(batches)
+    ts_type = table.schema.field('ts').type
+    if since is not None:
+        table = table.filter(pc.greater_equal(table['ts'], pa.scalar(_timestamp(since), ts_type)))
+    if until is not None:
+        table = table.filter(pc.less(table['ts'], pa.scalar(_timestamp(until), ts_type)))
+    return table.select(columns) if columns is not None else table
+
+
+def _timestamp(value):
+    import pandas as pd
+
+    ts = pd.Timestamp(value)
+    return (ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')).to_pydatetime()
+
+
+ENABLED = _env_flag('GRADEPATH_AUDIT')
+DIRECTORY = os.environ.get('GRADEPATH_AUDIT_DIR', 'audit')
+
+_audit_log = None
+_audit_lock = threading.Lock()
+
+
+def get_audit_log():
+    """Return the process-wide audit log, or None unless GRADEPATH_AUDIT is set"""
+    global _audit_log
+    if not ENABLED:
+        return None
+    if _audit_log is None:
+        with _audit_lock:
+            if _audit_log is None:
+                _audit_log = AuditLog(
+                    DIRECTORY,
+                    batch_rows=int(os.environ.get('GRADEPATH_AUDIT_BATCH', 1024)),
+                    flush_interval=float(os.environ.get('GRADEPATH_AUDIT_FLUSH_SECONDS', 1)),
+                    segment_bytes=int(float(os.environ.get('GRADEPATH_AUDIT_SEGMENT_MB', 64)) * (1 << 20)),
+                    segment_seconds=float(os.environ.get('GRADEPATH_AUDIT_SEGMENT_SECONDS', 3600)),
+                )
+                atexit.register(_audit_log.close)
+    return _audit_log
+
+
+def record(rows, predictions, grade_levels, model_version, latency, source, cached=False):
+    """Queue predictions in the process audit log (no-op unless GRADEPATH_AUDIT is set)"""
+    if ENABLED:
+        get_audit_log().record(rows, predictions, grade_levels, model_version, latency, source, cached)
+
+
+def record_chunks(scored_chunks, model_version, source):
+    """Pass score_chunks() output through, queueing each chunk's predictions in the audit log"""
+    start = time.perf_counter()
+    for scored, rejected, errors in scored_chunks:
+        if len(scored):
+            record(scored, scored['predicted_G3'], scored['grade_level'], model_version, time.perf_counter() - start, source)
+        yield scored, rejected, errors
+        start = time.perf_counter()
+
+
+def summarize(table):
+    """Return a per-day, per-model-version, per-source DataFrame of volume, latency and grade distribution"""
+    frame = table.select(['ts', 'model_version', 'source', 'latency_ms', 'predicted_G3', 'grade_level']).to_pandas()
+    frame['day'] = frame['ts'].dt.strftime('%Y-%m-%d')
+    grouped = frame.groupby(['day', 'model_version', 'source'])
+    summary = grouped.agg(
+        predictions=('predicted_G3', 'size'),
+        mean_G3=('predicted_G3', 'mean'),
+        p50_latency_ms=('latency_ms', 'median'),
+        p95_latency_ms=('latency_ms', lambda s: s.quantile(0.95)),
+    )
+    shares = grouped['grade_level'].value_counts(normalize=True).unstack(fill_value=0)
+    return summary.join(shares.add_prefix('share ')).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gradepath.audit", description="Query the GradePath prediction audit log.")
+    parser.add_argument("--dir", default=DIRECTORY, help="audit directory (default: %(default)s)")
+    parser.add_argument("--since", default=None, help="earliest timestamp, e.g. 2026-01-01 (UTC unless an offset is given)")
+    parser.add_argument("--until", default=None, help="timestamp to stop before")
+    parser.add_argument("--output", default=None, help="write matching records to a .parquet or .csv file instead")
+    args = parser.parse_args(argv)
+
+    table = query(args.dir, since=args.since, until=args.until)
+    if args.output:
+        if args.output.lower().endswith(('.parquet', '.pq')):
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, args.output)
+        else:
+            table.to_pandas().to_csv(args.output, index=False)
+        print(f"Wrote {table.num_rows:,} records to {args.output}", file=sys.stderr)
+    elif table.num_rows:
+        print(summarize(table).to_string(index=False, float_format='{:.2f}'.format))
+    else:
+        print(f"No audit records in {args.dir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
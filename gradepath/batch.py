@@ -0,0 +1,90 @@
+"""Chunked, vectorized scoring of whole rosters read from CSV or Parquet."""
+import os
+
+import pandas as pd
+
+from gradepath.recommendations import grade_bands
+from gradepath.schema import FEATURE_COLUMNS, validate_frame
+
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def roster_format(name):
+    """Return 'csv' or 'parquet' from a file name"""
+    ext = os.path.splitext(name)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    if ext in ('.csv', '.txt'):
+        return 'csv'
+    raise ValueError(f"Unsupported roster file type: {ext or name}")
+
+
+def count_rows(source, fmt):
+    """Return the number of data rows in a roster without parsing it, rewinding file objects"""
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        rows = pq.ParquetFile(source).metadata.num_rows
+    elif hasattr(source, 'read'):
+        rows, last = 0, b'\n'
+        for chunk in iter(lambda: source.read(1 << 20), b''):
+            rows += chunk.count(b'\n')
+            last = chunk[-1:]
+        # Header line, plus a final row without a trailing newline
+        rows = rows - 1 + (last != b'\n')
+    else:
+        with open(source, 'rb') as f:
+            return count_rows(f, fmt)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return max(rows, 0)
+
+
+def read_roster(source, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the roster as DataFrames of at most chunk_size rows"""
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        columns = [c for c in FEATURE_COLUMNS if c in parquet_file.schema_arrow.names]
+        if len(columns) < len(FEATURE_COLUMNS):
+            # Let validate_frame report exactly which columns are missing
+            columns = None
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        # Keep every column as text so validation sees the raw values
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=str, skipinitialspace=True)
+
+
+def score_frame(model, df):
+    """Predict G3 for an already validated frame and attach grade levels"""
+    predictions = model.predict(df[FEATURE_COLUMNS])
+    levels, _ = grade_bands(predictions)
+    scored = df.copy()
+    scored['predicted_G3'] = predictions
+    scored['grade_level'] = levels
+    return scored
+
+
+def score_chunks(model, chunks, id_column=None):
+    """Validate and score each chunk, yielding (scored_valid_rows, rejected_rows, column_errors).
+
+    When id_column is given it is copied from the input into the scored rows.
+    """
+    offset = 0
+    for chunk in chunks:
+        if id_column and id_column not in chunk.columns:
+            raise ValueError(f"ID column {id_column!r} not found in the roster")
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        clean, valid, errors = validate_frame(chunk)
+        if valid.any():
+            scored = score_frame(model, clean[valid])
+        else:
+            # Same columns as a scored chunk, so concatenated results keep them
+            scored = clean.iloc[:0].assign(predicted_G3=pd.Series(dtype=float), grade_level=pd.Series(dtype=object))
+        if id_column:
+            scored.insert(0, id_column, chunk.loc[scored.index, id_column])
+        yield scored, chunk[~valid], errors
@@ -0,0 +1,127 @@
+"""Bounded, thread-safe prediction cache shared by every session in the process."""
+import collections
+import threading
+import time
+
+from gradepath import audit, metrics
+from gradepath.recommendations import generate_recommendations
+from gradepath.registry import get_registry
+from gradepath.schema import FEATURE_COLUMNS
+
+
+def profile_key(input_dict):
+    """Canonical, hashable form of a 32-field profile (field order, trimmed text, integral numbers as int)"""
+    values = []
+    for column in FEATURE_COLUMNS:
+        value = input_dict[column]
+        if isinstance(value, str):
+            value = value.strip()
+        elif hasattr(value, 'item'):
+            value = value.item()
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        values.append(value)
+    return tuple(values)
+
+
+class PredictionCache:
+    """LRU cache with a size bound and a per-entry time-to-live"""
+
+    def __init__(self, maxsize=4096, ttl=3600.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.inc('gradepath_cache_requests_total', result='hit')
+                    return value
+                del self._entries[key]
+                self.evictions += 1
+            self.misses += 1
+            metrics.inc('gradepath_cache_requests_total', result='miss')
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, *_):
+        """Drop every entry; also used as the registry's reload listener"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    """Return the process-wide cache, cleared whenever the model file is reloaded"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                cache = PredictionCache()
+                get_registry().add_listener(cache.clear)
+                _cache = cache
+    return _cache
+
+
+def cached_prediction(input_dict):
+    """Return (prediction, recommendations, grade_level, grade_color) for a profile, using the cache"""
+    start = time.perf_counter()
+    registry = get_registry()
+    cache = get_prediction_cache()
+    # The model version is part of the key so a result computed by a model
+    # that was replaced mid-request is never served for the new one
+    with metrics.stage('model_load'):
+        model = registry.get()
+    key = (registry.version, profile_key(input_dict))
+    result = cache.get(key)
+    cached = result is not None
+    if result is None:
+        with metrics.stage('predict'):
+            prediction = float(registry.predict_records(input_dict)[0])
+        with metrics.stage('recommendations'):
+            recommendations, grade_level, grade_color = generate_recommendations(input_dict, prediction)
+        result = (prediction, recommendations, grade_level, grade_color)
+        if registry.get() is model:
+            cache.put(key, result)
+    metrics.inc('gradepath_predictions_total', source='form')
+    audit.record(input_dict, [result[0]], [result[2]], registry.version, time.perf_counter() - start, 'form', cached)
+    return result
@@ -0,0 +1,104 @@
+"""Precomputed feature encoding for the pipeline's fitted ColumnTransformer.
+
+The fitted OneHotEncoder and StandardScaler never change after training, so
+their category lookups and scaling coefficients are extracted once and used to
+fill a preallocated float matrix straight from ``input_dict`` rows, without
+building a DataFrame or going through the ColumnTransformer.
+"""
+import numpy as np
+
+
+class FeatureEncoder:
+    """Turns form rows into the exact feature matrix the ColumnTransformer produces"""
+
+    def __init__(self, n_features, numeric, categorical):
+        # numeric: list of (column, output index, mean, scale)
+        # categorical: list of (column, {category: output index}, handle_unknown)
+        self.n_features = n_features
+        self.numeric_columns = [name for name, _, _, _ in numeric]
+        self.numeric_index = np.array([index for _, index, _, _ in numeric], dtype=np.intp)
+        self.numeric_mean = np.array([mean for _, _, mean, _ in numeric], dtype=np.float64)
+        self.numeric_scale = np.array([scale for _, _, _, scale in numeric], dtype=np.float64)
+        self.categorical = categorical
+
+    @classmethod
+    def from_column_transformer(cls, transformer):
+        """Extract lookup tables from a fitted ColumnTransformer of OneHotEncoder/StandardScaler parts"""
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        if transformer.sparse_output_:
+            raise ValueError("Sparse ColumnTransformer output is not supported")
+        numeric, categorical = [], []
+        for name, step, columns in transformer.transformers_:
+            if step == 'drop' or len(columns) == 0:
+                continue
+            start = transformer.output_indices_[name].start
+            if isinstance(step, StandardScaler):
+                means = step.mean_ if step.with_mean else np.zeros(len(columns))
+                scales = step.scale_ if step.with_std else np.ones(len(columns))
+                for i, column in enumerate(columns):
+                    numeric.append((column, start + i, means[i], scales[i]))
+            elif isinstance(step, OneHotEncoder):
+                if step.drop is not None or getattr(step, '_infrequent_enabled', False):
+                    raise ValueError("OneHotEncoder with drop or infrequent categories is not supported")
+                for column, categories in zip(columns, step.categories_):
+                    lookup = {value.item() if hasattr(value, 'item') else value: start + j
+                              for j, value in enumerate(categories)}
+                    categorical.append((column, lookup, step.handle_unknown))
+                    start += len(categories)
+            else:
+                raise ValueError(f"Unsupported transformer {name!r}: {step!r}")
+        n_features = max(indices.stop for indices in transformer.output_indices_.values())
+        return cls(n_features, numeric, categorical)
+
+    def output_fields(self):
+        """Return the form field each output column was derived from"""
+        fields = [None] * self.n_features
+        for name, index in zip(self.numeric_columns, self.numeric_index):
+            fields[index] = name
+        for column, lookup, _ in self.categorical:
+            for index in lookup.values():
+                fields[index] = column
+        return fields
+
+    def numeric_column(self, name):
+        """Return (output index, mean, scale) of a standardized numeric field"""
+        i = self.numeric_columns.index(name)
+        return self.numeric_index[i], self.numeric_mean[i], self.numeric_scale[i]
+
+    def _matrix(self, n_rows, out):
+        if out is None:
+            return np.zeros((n_rows, self.n_features), dtype=np.float64)
+        if out.shape != (n_rows, self.n_features):
+            raise ValueError(f"out must have shape {(n_rows, self.n_features)}, got {out.shape}")
+        out.fill(0.0)
+        return out
+
+    def _one_hot(self, column, lookup, handle_unknown, values, out):
+        for row, value in enumerate(values):
+            index = lookup.get(value)
+            if index is not None:
+                out[row, index] = 1.0
+            elif handle_unknown == 'error':
+                raise ValueError(f"Found unknown category {value!r} in column {column!r}")
+
+    def encode(self, rows, out=None):
+        """Encode one mapping or a sequence of mappings with the form's fields"""
+        if hasattr(rows, 'keys'):
+            rows = [rows]
+        out = self._matrix(len(rows), out)
+        numeric = np.array([[row[name] for name in self.numeric_columns] for row in rows], dtype=np.float64)
+        out[:, self.numeric_index] = (numeric.reshape(len(rows), -1) - self.numeric_mean) / self.numeric_scale
+        for column, lookup, handle_unknown in self.categorical:
+            self._one_hot(column, lookup, handle_unknown, [row[column] for row in rows], out)
+        return out
+
+    def encode_columns(self, columns, out=None):
+        """Encode column-oriented data such as a DataFrame or a dict of arrays"""
+        n_rows = len(columns[self.numeric_columns[0] if self.numeric_columns else self.categorical[0][0]])
+        out = self._matrix(n_rows, out)
+        for name, index, mean, scale in zip(self.numeric_columns, self.numeric_index, self.numeric_mean, self.numeric_scale):
+            out[:, index] = (np.asarray(columns[name], dtype=np.float64) - mean) / scale
+        for column, lookup, handle_unknown in self.categorical:
+            self._one_hot(column, lookup, handle_unknown, np.asarray(columns[column], dtype=object).tolist(), out)
+        return out
@@ -0,0 +1,165 @@
+"""Exact path-dependent TreeSHAP attributions for the pipeline's forest.
+
+Each leaf contributes to the prediction through the product of one factor per
+distinct feature on its root-to-leaf path: 1 or 0 when the feature is known
+(does the sample satisfy the path's interval for it?) and the share of
+training cover that followed the path when it is not. The Shapley value of a
+feature for such a product game is
+
+    phi_i = v * (o_i - z_i) * integral_0^1 prod_{j != i} (z_j (1 - t) + o_j t) dt
+
+where o_j is the 0/1 indicator and z_j the cover fraction. The integrand is a
+polynomial of degree |U| - 1 in t, so Gauss-Legendre quadrature with
+ceil(|U| / 2) nodes evaluates it exactly. Summing over leaves and trees gives
+the same values as Lundberg et al.'s recursive algorithm.
+
+Since o_j is 0 or 1, each factor is one of two values per quadrature node,
+and both are tabulated for every leaf when the explainer is built. For a
+batch of students the product over a path is then
+exp(sum_j log z_j (1 - t) + sum_j o_j log(1 + t / (z_j (1 - t)))), one
+matrix product per group of leaves with the same |U|, and the leave-one-out
+integrals, already multiplied by v (o_i - z_i), are a second matrix product
+against the tables for o_i = 0 and o_i = 1. The tables are shared by every
+student; per student only the indicators and the two products are computed.
+
+This is still far costlier than predicting: the work grows with students
+times leaves times |U|^2, and only batches amortize NumPy's per-call
+overhead. One student takes 11 to 15 ms, 30 to 45 times
+CompiledModel.predict_records on the same row; 100 students take about
+0.4 s, with about 30 MB of temporaries at the default ``max_elements``
+(benchmarks/run_suite.py reports both ratios). Callers should compute an
+explanation once per prediction and keep it.
+"""
+import functools
+import math
+
+import numpy as np
+import pandas as pd
+
+from gradepath.forest import FlatForest
+from gradepath.schema import FEATURE_COLUMNS
+
+
+class ForestExplainer:
+    """Precomputed leaf paths of a fitted RandomForestRegressor, grouped by path length"""
+
+    def __init__(self, groups, expected_value, n_features):
+        # One dict per path length: per-leaf path arrays 'feature', 'low', 'high', 'nan_ok'
+        # (n_leaves, n_path_features) and the quadrature tables
+        self.groups = groups
+        self.expected_value = float(expected_value)
+        self.n_features = int(n_features)
+
+    @classmethod
+    def from_regressor(cls, forest):
+        return cls.from_forest(FlatForest.from_regressor(forest))
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Build from a FlatForest that carries per-node cover"""
+        if forest.cover is None:
+            raise ValueError("The flattened forest has no node cover to explain with")
+        paths = {}
+        expected_value = 0.0
+        n_trees = forest.n_trees
+        cover = forest.cover
+        for root in forest.roots:
+            # Stack of (node, {feature: [low, high, cover fraction, nan follows path]})
+            stack = [(int(root), {})]
+            while stack:
+                node, conditions = stack.pop()
+                left, right = int(forest.left[node]), int(forest.right[node])
+                if left == node:
+                    value = forest.value[node] / n_trees
+                    expected_value += value * math.prod(c[2] for c in conditions.values())
+                    paths.setdefault(len(conditions), []).append((conditions, value))
+                    continue
+                feature, threshold = int(forest.feature[node]), forest.threshold[node]
+                for child, went_left in ((left, True), (right, False)):
+                    low, high, fraction, nan_ok = conditions.get(feature, (-np.inf, np.inf, 1.0, True))
+                    if went_left:
+                        high = min(high, threshold)
+                    else:
+                        low = max(low, threshold)
+                    updated = dict(conditions)
+                    updated[feature] = (low, high, fraction * cover[child] / cover[node],
+                                        nan_ok and bool(forest.missing_left[node]) == went_left)
+                    stack.append((child, updated))
+
+        groups = []
+        for size, leaves in sorted(paths.items()):
+            if size == 0:
+                continue
+            rows = [[(f, *c) for f, c in conditions.items()] for conditions, _ in leaves]
+            table = np.array(rows, dtype=np.float64)  # (n_leaves, size, 5)
+            cover = table[:, :, 3]
+            nodes, weights = np.polynomial.legendre.leggauss(max(1, math.ceil(size / 2)))
+            nodes, weights = (nodes + 1) / 2, weights / 2  # map from [-1, 1] to [0, 1]
+            # Factor z (1 - t) + o t at every quadrature node, for o = 0 and o = 1: (n_leaves, nodes, size)
+            off_path = cover[:, None, :] * (1 - nodes)[None, :, None]
+            on_path = off_path + nodes[None, :, None]
+            log_off = np.log(off_path)
+            # v (o_i - z_i) w / factor_i, turning quadrature values of the whole product into
+            # leave-one-out contributions: (n_leaves, 2 * size, nodes), rows for o_i = 0 then o_i = 1
+            scale = np.array([value for _, value in leaves])[:, None, None] * weights[None, :, None]
+            leave_one_out = np.concatenate([-cover[:, None, :] * scale / off_path,
+                                            (1 - cover[:, None, :]) * scale / on_path], axis=2)
+            groups.append({
+                'feature': table[:, :, 0].astype(np.intp),
+                'low': table[:, :, 1, None],
+                'high': table[:, :, 2, None],
+                'nan_ok': table[:, :, 4, None].astype(bool),
+                'log_off': log_off.sum(axis=2, keepdims=True),  # (n_leaves, nodes, 1)
+                'log_ratio': np.log(on_path) - log_off,  # (n_leaves, nodes, size)
+                'leave_one_out': np.ascontiguousarray(leave_one_out.transpose(0, 2, 1)),
+            })
+        return cls(groups, expected_value, forest.n_features)
+
+    def shap_values(self, X, max_elements=1_000_000):
+        """Return attributions of shape (n_samples, n_features); each row sums to prediction - expected_value
+
+        Students are taken in chunks so that no (leaves, size, students) array
+        holds more than about ``max_elements`` values.
+        """
+        # Split decisions are made on float32 features, as in sklearn; students along the last axis
+        X = np.asarray(X, dtype=np.float32).T.astype(np.float64)
+        n_samples = X.shape[1]
+        missing = bool(np.isnan(X).any())
+        phi = np.zeros(self.n_features * n_samples)
+        for group in self.groups:
+            n_leaves, size = group['feature'].shape
+            step = max(1, max_elements // (2 * n_leaves * size))
+            for start in range(0, n_samples, step):
+                x = X[:, start:start + step][group['feature']]  # (leaves, size, rows)
+                on_path = (x > group['low']) & (x <= group['high'])
+                if missing:
+                    on_path |= np.isnan(x) & group['nan_ok']
+                # Product of the path's factors at each quadrature node: (leaves, nodes, rows);
+                # factors are never zero since cover fractions are positive and nodes inside (0, 1)
+                products = np.exp(group['log_off'] + group['log_ratio'] @ on_path.astype(np.float64))
+                both = group['leave_one_out'] @ products  # (leaves, 2 * size, rows)
+                contributions = np.where(on_path, both[:, size:], both[:, :size])
+                rows = np.arange(start, start + x.shape[2])
+                index = (group['feature'][:, :, None] * n_samples + rows).ravel()
+                phi += np.bincount(index, weights=contributions.ravel(), minlength=phi.size)
+        return phi.reshape(self.n_features, n_samples).T
+
+
+@functools.lru_cache(maxsize=2)
+def get_explainer(compiled):
+    """Build (once per compiled model) the explainer for its forest"""
+    return ForestExplainer.from_forest(compiled.forest)
+
+
+def explain_records(records, compiled):
+    """Attribute predictions for one input_dict or a list of them to the 32 form fields.
+
+    Returns (expected_value, predictions, DataFrame of per-field attributions);
+    one-hot columns are summed back into their categorical field.
+    """
+    X = compiled.encoder.encode(records)
+    explainer = get_explainer(compiled)
+    phi = explainer.shap_values(X)
+    fields = compiled.encoder.output_fields()
+    by_field = pd.DataFrame(phi, columns=fields).T.groupby(level=0, sort=False).sum().T
+    return explainer.expected_value, compiled.predict_features(X), by_field.reindex(columns=FEATURE_COLUMNS, fill_value=0.0)
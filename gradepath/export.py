@@ -0,0 +1,237 @@
+"""Streaming cohort export: per-student reports, a CSV summary and recommendations in one archive.
+
+The roster is scored chunk by chunk and each student's text report is added
+to the archive as soon as it is rendered. ``summary.csv`` and
+``recommendations.csv`` are spooled to temporary files and appended at the
+end. Memory therefore depends on the chunk size, not on the cohort size, and
+the archive can go to a non-seekable stream or be consumed as an iterator of
+byte chunks for an HTTP response.
+
+For ZIP, zipfile keeps the central directory in memory until the archive is
+closed, about half a kilobyte per student. tar.gz has no such index,
+so it is the format to use for unbounded cohorts.
+
+    python -m gradepath.export roster.csv reports.zip --id-column student_id
+"""
+import argparse
+import io
+import itertools
+import re
+import shutil
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+
+import pandas as pd
+
+from gradepath.batch import DEFAULT_CHUNK_SIZE, read_roster, roster_format, score_chunks
+from gradepath.recommendations import recommend_batch
+from gradepath.registry import MODEL_PATH, ModelRegistry
+from gradepath.report import build_report
+from gradepath.schema import FEATURE_COLUMNS
+
+
+ARCHIVE_TYPES = {
+    'zip': 'application/zip',
+    'tar.gz': 'application/gzip',
+}
+
+
+def archive_format(name):
+    """Return 'zip' or 'tar.gz' from an archive file name"""
+    lower = name.lower()
+    if lower.endswith('.zip'):
+        return 'zip'
+    if lower.endswith(('.tar.gz', '.tgz')):
+        return 'tar.gz'
+    raise ValueError(f"Unsupported archive type: {name}")
+
+
+class _Sink(io.RawIOBase):
+    """Write-only stream that holds bytes until they are drained"""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class ReportArchive:
+    """Adds members to a ZIP or tar.gz archive written sequentially to any writable stream"""
+
+    def __init__(self, fileobj, fmt='zip', mtime=None):
+        if fmt not in ARCHIVE_TYPES:
+            raise ValueError(f"Unsupported archive format: {fmt}")
+        self.fmt = fmt
+        self.mtime = time.time() if mtime is None else mtime
+        if fmt == 'zip':
+            self._archive = zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED)
+        else:
+            # Stream mode never seeks, so the output can be a pipe or a socket
+            self._archive = tarfile.open(fileobj=fileobj, mode='w|gz')
+
+    def _zip_info(self, name):
+        info = zipfile.ZipInfo(name, time.localtime(self.mtime)[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    def _tar_info(self, name, size):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(self.mtime)
+        return info
+
+    def add(self, name, data):
+        """Add one member from bytes"""
+        if self.fmt == 'zip':
+            self._archive.writestr(self._zip_info(name), data)
+        else:
+            self._archive.addfile(self._tar_info(name, len(data)), io.BytesIO(data))
+            # TarFile remembers every member it wrote; a write-only stream never reads them back
+            self._archive.members.clear()
+
+    def add_file(self, name, f):
+        """Add one member copied from a seekable binary file, from its start"""
+        size = f.seek(0, io.SEEK_END)
+        f.seek(0)
+        if self.fmt == 'zip':
+            with self._archive.open(self._zip_info(name), 'w', force_zip64=size > zipfile.ZIP64_LIMIT) as dest:
+                shutil.copyfileobj(f, dest)
+        else:
+            self._archive.addfile(self._tar_info(name, size), f)
+
+    def close(self):
+        self._archive.close()
+
+
+def _member_name(row, student_id=None):
+    name = f"{row + 1:06d}"
+    if student_id is not None and not pd.isna(student_id):
+        name += '_' + re.sub(r'[^\w.-]+', '_', str(student_id)).strip('._')[:64]
+    return f"reports/{name}.txt"
+
+
+def frame_chunks(scored, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Split an already scored frame into score_chunks()-style tuples"""
+    for start in range(0, len(scored), chunk_size):
+        yield scored.iloc[start:start + chunk_size], scored.iloc[:0], {}
+
+
+def write_reports(archive, scored_chunks, id_column=None, generated_on=None):
+    """Write reports for score_chunks() output into the archive, yielding a running summary after each chunk"""
+    if generated_on is None:
+        generated_on = pd.Timestamp.now()
+    summary = {'rows': 0, 'scored': 0, 'rejected': 0, 'column_errors': {}}
+    keys = [id_column] if id_column else []
+    with tempfile.TemporaryFile() as summary_file, tempfile.TemporaryFile() as recommendations_file:
+        summary_text = io.TextIOWrapper(summary_file, encoding='utf-8', newline='')
+        recommendations_text = io.TextIOWrapper(recommendations_file, encoding='utf-8', newline='')
+        header = True
+        for scored, rejected, errors in scored_chunks:
+            if len(scored):
+                predictions = scored['predicted_G3'].to_numpy()
+                recommendations, _, _ = recommend_batch(scored, predictions)
+                ids = scored[id_column].tolist() if id_column else itertools.repeat(None)
+                names, detail = [], []
+                for row, student_id, profile, prediction, level, recs in zip(
+                    scored.index, ids, scored[FEATURE_COLUMNS].to_dict('records'), predictions,
+                    scored['grade_level'], recommendations,
+                ):
+                    name = _member_name(row, student_id)
+                    archive.add(name, build_report(prediction, level, profile, generated_on, recs).encode('utf-8'))
+                    names.append(name)
+                    key = (student_id,) if id_column else ()
+                    detail.extend((row, *key, rec['category'], rec['text']) for rec in recs)
+
+                out = scored[keys + ['predicted_G3', 'grade_level']].copy()
+                out.insert(0, 'row', scored.index)
+                out['recommendations'] = ['; '.join(rec['category'] for rec in recs) for recs in recommendations]
+                out['report'] = names
+                out.to_csv(summary_text, index=False, header=header)
+                pd.DataFrame(detail, columns=['row'] + keys + ['category', 'text']).to_csv(
+                    recommendations_text, index=False, header=header)
+                header = False
+
+            summary['scored'] += len(scored)
+            summary['rejected'] += len(rejected)
+            summary['rows'] += len(scored) + len(rejected)
+            for col, count in errors.items():
+                summary['column_errors'][col] = summary['column_errors'].get(col, 0) + count
+            yield summary
+
+        for name, text, f in (('summary.csv', summary_text, summary_file),
+                              ('recommendations.csv', recommendations_text, recommendations_file)):
+            text.flush()
+            archive.add_file(name, f)
+            text.detach()
+    yield summary
+
+
+def export_cohort(scored_chunks, fileobj, fmt='zip', id_column=None, generated_on=None):
+    """Write the whole cohort archive to fileobj; returns the summary dict"""
+    archive = ReportArchive(fileobj, fmt)
+    try:
+        for summary in write_reports(archive, scored_chunks, id_column, generated_on):
+            pass
+    finally:
+        archive.close()
+    return summary
+
+
+def iter_archive(scored_chunks, fmt='zip', id_column=None, generated_on=None):
+    """Yield the cohort archive as byte chunks while it is being built"""
+    sink = _Sink()
+    archive = ReportArchive(sink, fmt)
+    for _ in write_reports(archive, scored_chunks, id_column, generated_on):
+        data = sink.drain()
+        if data:
+            yield data
+    archive.close()
+    yield sink.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gradepath.export",
+                                     description="Export per-student GradePath reports for a roster.")
+    parser.add_argument("input", help="roster file (.csv or .parquet) with the prediction form's 32 columns")
+    parser.add_argument("output", help="archive to write (.zip, .tar.gz or .tgz), or - for stdout")
+    parser.add_argument("--format", choices=sorted(ARCHIVE_TYPES), default=None,
+                        help="archive format (default: from the output name; zip for stdout)")
+    parser.add_argument("--model", default=MODEL_PATH, help="path to the trained pipeline (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--id-column", default=None, help="input column used to identify students in the archive")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ('zip' if args.output == '-' else archive_format(args.output))
+    model = ModelRegistry(args.model, poll_interval=None).predictor()
+    scored_chunks = score_chunks(model, read_roster(args.input, roster_format(args.input), args.chunk_size), args.id_column)
+    start = time.perf_counter()
+    if args.output == '-':
+        summary = export_cohort(scored_chunks, sys.stdout.buffer, fmt, args.id_column)
+    else:
+        with open(args.output, 'wb') as f:
+            summary = export_cohort(scored_chunks, f, fmt, args.id_column)
+    print(
+        f"Exported {summary['scored']:,} reports of {summary['rows']:,} rows in {time.perf_counter() - start:.1f}s; "
+        f"{summary['rejected']:,} rejected",
+        file=sys.stderr,
+    )
+    for col, count in sorted(summary['column_errors'].items()):
+        print(f"  {col}: {count:,} invalid values", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""Opt-in latency histograms, counters and a per-session sampling profiler.
+
+Nothing is recorded unless the process is started with ``GRADEPATH_METRICS=1``;
+when disabled every call here is a cheap no-op. Configuration:
+
+    GRADEPATH_METRICS=1            record stage latencies and counters
+    GRADEPATH_METRICS_PORT=9464    serve Prometheus text at http://<host>:<port>/metrics
+    GRADEPATH_METRICS_FILE=path    rewrite Prometheus text to a file periodically
+    GRADEPATH_METRICS_INTERVAL=15  seconds between file flushes
+    GRADEPATH_PROFILING=1          allow ``?profile=1`` to sample one session's script runs
+    GRADEPATH_PROFILE_DIR=profiles where sampled stacks are written (collapsed-stack format)
+    GRADEPATH_PROFILE_IDLE_SECONDS=300  stop a session's profiler after this long without a rerun
+    GRADEPATH_PROFILE_MAX_SECONDS=1800  ...or after this long in total
+"""
+import collections
+import contextlib
+import http.server
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histograms that do not measure seconds
+BUCKETS = {
+    'gradepath_api_batch_size': (1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+}
+
+HELP = {
+    'gradepath_stage_seconds': ('histogram', 'Latency of each request stage in seconds.'),
+    'gradepath_stage_errors_total': ('counter', 'Exceptions raised inside each request stage.'),
+    'gradepath_predictions_total': ('counter', 'Students scored, by source.'),
+    'gradepath_cache_requests_total': ('counter', 'Prediction cache lookups, by result.'),
+    'gradepath_model_loads_total': ('counter', 'Times the model file was loaded.'),
+    'gradepath_model_load_seconds': ('histogram', 'Time spent unpickling the model file.'),
+    'gradepath_api_batch_size': ('histogram', 'Students per API micro-batch.'),
+    'gradepath_startup_seconds': ('histogram', 'Duration of each warm-up stage at process start.'),
+    'gradepath_audit_rows_total': ('counter', 'Prediction audit records, by result (written or dropped).'),
+    'gradepath_audit_flush_seconds': ('histogram', 'Time the audit writer spent converting and appending one batch.'),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _env_flag(name):
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Metrics:
+    """Thread-safe store of counters and fixed-bucket histograms"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = collections.defaultdict(float)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(BUCKETS.get(name, self.buckets)), 0.0, 0]
+            for i, bound in enumerate(BUCKETS.get(name, self.buckets)):
+                if value <= bound:
+                    histogram[0][i] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            # Streamlit's st.rerun()/st.stop() use exceptions for control flow
+            if not type(e).__module__.startswith('streamlit'):
+                self.inc('gradepath_stage_errors_total', stage=name)
+            raise
+        finally:
+            self.observe('gradepath_stage_seconds', time.perf_counter() - start, stage=name)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, ([*h[0]], h[1], h[2])) for key, h in self._histograms.items())
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described and name in HELP:
+                kind, text = HELP[name]
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+                described.add(name)
+
+        for (name, labels), value in counters:
+            describe(name)
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+        for (name, labels), (buckets, total, count) in histograms:
+            describe(name)
+            for bound, bucket_count in zip(BUCKETS.get(name, self.buckets), buckets):
+                lines.append(f"{name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {bucket_count}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + '}'
+
+
+ENABLED = _env_flag('GRADEPATH_METRICS')
+METRICS = Metrics()
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def stage(name):
+    """Context manager timing one request stage (no-op unless metrics are enabled)"""
+    return METRICS.stage(name) if ENABLED else _NULL_STAGE
+
+
+def inc(name, amount=1, **labels):
+    if ENABLED:
+        METRICS.inc(name, amount, **labels)
+
+
+def observe(name, value, **labels):
+    if ENABLED:
+        METRICS.observe(name, value, **labels)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = METRICS.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _flush_loop(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(METRICS.render())
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.exception("Could not write metrics to %s", path)
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_exporters():
+    """Start the configured HTTP endpoint and/or file flusher once per process"""
+    global _exporters_started
+    if not ENABLED or _exporters_started:
+        return
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+        port = os.environ.get('GRADEPATH_METRICS_PORT')
+        if port:
+            try:
+                server = http.server.ThreadingHTTPServer(('', int(port)), _Handler)
+            except OSError:
+                # Another worker on this host already serves the port
+                logger.warning("Metrics port %s is in use; not serving /metrics from this process", port)
+            else:
+                threading.Thread(target=server.serve_forever, name="gradepath-metrics-http", daemon=True).start()
+        path = os.environ.get('GRADEPATH_METRICS_FILE')
+        if path:
+            interval = float(os.environ.get('GRADEPATH_METRICS_INTERVAL', 15))
+            threading.Thread(target=_flush_loop, args=(path, interval), name="gradepath-metrics-file", daemon=True).start()
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval, like py-spy, from inside the process.
+
+    Stacks are aggregated in collapsed form (``outer;inner;leaf count``), ready
+    for flamegraph tools, and rewritten to ``path`` every ``flush_interval``.
+    The profiler stops itself ``idle_timeout`` seconds after the last attach(),
+    as happens when the tab is closed, or ``max_seconds`` after it started.
+    """
+
+    def __init__(self, path, interval=0.005, flush_interval=5.0, idle_timeout=300.0, max_seconds=1800.0):
+        self.path = path
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.idle_timeout = idle_timeout
+        self.max_seconds = max_seconds
+        self.thread_id = None
+        self.samples = collections.Counter()
+        self._target = None
+        self._attached_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and not self._stop.is_set()
+
+    def attach(self, thread_id=None):
+        """Sample the given thread (default: the calling thread) from now on"""
+        self.thread_id = thread_id or threading.get_ident()
+        # Kept so a later thread that reuses the ident is never sampled
+        self._target = next((t for t in threading.enumerate() if t.ident == self.thread_id), None)
+        self._attached_at = time.monotonic()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="gradepath-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        started = time.monotonic()
+        next_flush = started + self.flush_interval
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            if now - started > self.max_seconds or now - (self._attached_at or started) > self.idle_timeout:
+                logger.info("Stopping the session profiler writing %s", self.path)
+                self.stop()
+                return
+            target = self._target
+            frame = sys._current_frames().get(self.thread_id) if target is not None and target.is_alive() else None
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                with self._lock:
+                    self.samples[';'.join(reversed(stack))] += 1
+            if now >= next_flush:
+                self.flush()
+                next_flush = now + self.flush_interval
+
+    def flush(self):
+        with self._lock:
+            counts = self.samples.most_common()
+        if not counts:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w') as f:
+            for stack, count in counts:
+                f.write(f"{stack} {count}\n")
+
+
+def profiling_allowed():
+    return _env_flag('GRADEPATH_PROFILING')
+
+
+def update_session_profiler(session_state, requested):
+    """Start, re-attach or stop the sampling profiler kept in a session's state"""
+    profiler = session_state.get('_gradepath_profiler')
+    if profiler is not None and not profiler.running:
+        # Timed out; a request that is still on starts a new profile
+        del session_state['_gradepath_profiler']
+        profiler = None
+    if requested and profiling_allowed():
+        if profiler is None:
+            directory = os.environ.get('GRADEPATH_PROFILE_DIR', 'profiles')
+            name = f"session-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.collapsed"
+            path = os.path.join(directory, name)
+            profiler = SamplingProfiler(
+                path,
+                idle_timeout=float(os.environ.get('GRADEPATH_PROFILE_IDLE_SECONDS', 300)),
+                max_seconds=float(os.environ.get('GRADEPATH_PROFILE_MAX_SECONDS', 1800)),
+            )
+            profiler.start()
+            session_state['_gradepath_profiler'] = profiler
+        # Each rerun may execute on a different script thread
+        profiler.attach()
+    elif profiler is not None:
+        profiler.stop()
+        del session_state['_gradepath_profiler']
+    return profiler
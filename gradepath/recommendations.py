@@ -0,0 +1,201 @@
+"""Grade bands and personalized recommendations for a predicted final grade.
+
+Recommendations are a declarative rule table. Each rule lists
+``(field, operator, value)`` conditions on the form fields (or on
+``prediction``), combined with ``'any'`` or ``'all'``. The table is evaluated
+as boolean masks over whole columns, so a cohort is handled in one pass and a
+single student is just a batch of one.
+"""
+import operator
+
+import numpy as np
+
+
+# (upper bound, level, color); the last band has no upper bound
+GRADE_BANDS = [
+    (10, "At Risk", "#ef4444"),
+    (14, "Needs Improvement", "#f59e0b"),
+    (16, "Good Performance", "#10b981"),
+    (None, "Excellent Performance", "#6366f1"),
+]
+
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Evaluated in order; 'match' defaults to 'all'. Text may use {field} placeholders.
+RULES = [
+    # Academic Performance Recommendations
+    {
+        'category': '📚 Academic Performance',
+        'when': [('G1', '<', 12), ('G2', '<', 12)],
+        'match': 'any',
+        'text': 'Your previous grades suggest you need to strengthen your study foundation. Consider reviewing past topics and seeking help from teachers or tutors to improve your understanding of core concepts.',
+    },
+    # Study Time Recommendations
+    {
+        'category': '⏰ Study Habits',
+        'when': [('studytime', '<=', 2)],
+        'text': 'You\'re spending less than 5 hours per week studying. Research shows that increasing study time to 5-10 hours weekly can significantly improve academic performance. Try breaking study sessions into manageable chunks.',
+    },
+    # Attendance Issues
+    {
+        'category': '🎯 Attendance',
+        'when': [('absences', '>', 10)],
+        'text': 'With {absences} absences, you\'re missing valuable classroom instruction. Regular attendance is crucial for academic success. Try to minimize absences and catch up on missed material promptly.',
+    },
+    # Alcohol Consumption
+    {
+        'category': '🚨 Health & Lifestyle',
+        'when': [('Dalc', '>=', 3), ('Walc', '>=', 4)],
+        'match': 'any',
+        'text': 'High alcohol consumption can significantly impact academic performance, memory, and concentration. Consider reducing alcohol intake and exploring healthier stress-relief activities like sports or hobbies.',
+    },
+    # Health Issues
+    {
+        'category': '💪 Health & Wellness',
+        'when': [('health', '<=', 2)],
+        'text': 'Poor health can affect your ability to learn and perform well. Consider consulting a healthcare professional, maintaining a balanced diet, getting regular exercise, and ensuring adequate sleep.',
+    },
+    # Family Support
+    {
+        'category': '👨‍👩‍👧‍👦 Support System',
+        'when': [('famsup', '==', 'no')],
+        'text': 'Family support plays a crucial role in academic success. Consider having open conversations with family members about your educational goals and seek their encouragement and assistance.',
+    },
+    # Extracurricular Activities
+    {
+        'category': '🎨 Personal Development',
+        'when': [('activities', '==', 'no')],
+        'text': 'Participating in extracurricular activities can improve social skills, time management, and overall well-being, which often translates to better academic performance. Consider joining clubs or sports teams.',
+    },
+    # Social Life Balance
+    {
+        'category': '⚖️ Work-Life Balance',
+        'when': [('goout', '>=', 4)],
+        'text': 'While social activities are important, excessive going out might impact study time and academic focus. Try to find a healthy balance between social life and academic responsibilities.',
+    },
+    # Past Failures
+    {
+        'category': '🎯 Academic Recovery',
+        'when': [('failures', '>=', 2)],
+        'text': 'Having multiple past failures indicates need for academic strategy change. Consider working with a counselor to identify learning challenges, develop better study methods, and create a structured academic plan.',
+    },
+    # Travel Time Impact
+    {
+        'category': '🚌 Time Management',
+        'when': [('traveltime', '>=', 3)],
+        'text': 'Long commute times can reduce available study time and increase fatigue. Use travel time productively (reading, audio lessons) or consider finding study spaces closer to school.',
+    },
+    # Technology Access
+    {
+        'category': '💻 Educational Resources',
+        'when': [('internet', '==', 'no')],
+        'text': 'Internet access provides valuable educational resources and research opportunities. Consider accessing internet at libraries, school, or community centers to supplement your learning.',
+    },
+    # Higher Education Aspiration
+    {
+        'category': '🎓 Future Planning',
+        'when': [('higher', '==', 'no'), ('prediction', '>=', 12)],
+        'match': 'all',
+        'text': 'Your academic potential suggests you could succeed in higher education. Consider exploring post-secondary options, as they can significantly expand career opportunities and earning potential.',
+    },
+    # Positive Reinforcements
+    {
+        'category': '🌟 Keep Up the Great Work',
+        'when': [('prediction', '>=', 14)],
+        'text': 'You\'re performing well academically! Continue your current study habits, maintain a balanced lifestyle, and consider helping peers who might be struggling - teaching others can reinforce your own learning.',
+    },
+]
+
+# Form fields the rules read
+RULE_FIELDS = sorted({field for rule in RULES for field, _, _ in rule['when'] if field != 'prediction'})
+
+POSITIVE_CATEGORY = '🌟 Keep Up the Great Work'
+
+# Given when no rule fired, or only the positive reinforcement did
+FALLBACK = {
+    'category': '📈 Continuous Improvement',
+    'text': 'You\'re on a good path! Focus on maintaining consistent study habits, staying organized, and setting specific academic goals. Regular self-assessment and seeking feedback can help you continue improving.',
+}
+
+# Category of each column returned by rule_masks
+RULE_CATEGORIES = [rule['category'] for rule in RULES] + [FALLBACK['category']]
+
+
+def grade_band(prediction):
+    """Return the (grade_level, grade_color) band for one predicted grade"""
+    for upper, level, color in GRADE_BANDS:
+        if upper is None or prediction < upper:
+            return level, color
+
+
+def grade_bands(predictions):
+    """Return grade level and color arrays for an array of predicted grades"""
+    predictions = np.asarray(predictions, dtype=float)
+    conditions = [predictions < upper for upper, _, _ in GRADE_BANDS[:-1]]
+    levels = np.select(conditions, [level for _, level, _ in GRADE_BANDS[:-1]], default=GRADE_BANDS[-1][1])
+    colors = np.select(conditions, [color for _, _, color in GRADE_BANDS[:-1]], default=GRADE_BANDS[-1][2])
+    return levels, colors
+
+
+def rule_masks(columns, predictions, rules=RULES):
+    """Evaluate the rule table; returns a boolean array of shape (n_students, n_rules + 1).
+
+    ``columns`` is a DataFrame or a mapping of field name to array. The last
+    column of the result is the fallback recommendation.
+    """
+    predictions = np.asarray(predictions, dtype=float)
+    masks = np.empty((len(predictions), len(rules) + 1), dtype=bool)
+    for i, rule in enumerate(rules):
+        tests = [
+            OPERATORS[op](predictions if field == 'prediction' else np.asarray(columns[field]), value)
+            for field, op, value in rule['when']
+        ]
+        combine = np.logical_or if rule.get('match', 'all') == 'any' else np.logical_and
+        masks[:, i] = combine.reduce(tests) if len(tests) > 1 else tests[0]
+    positive = [i for i, rule in enumerate(rules) if rule['category'] == POSITIVE_CATEGORY]
+    others = masks[:, [i for i in range(len(rules)) if i not in positive]].any(axis=1)
+    masks[:, -1] = ~others
+    return masks
+
+
+def _rule_texts(rule, columns, mask):
+    """Return the rule's text, or {row: formatted text} for the matching rows if it has placeholders"""
+    if '{' not in rule['text']:
+        return rule['text']
+    fields = [field for field, _, _ in rule['when'] if field != 'prediction']
+    values = {field: np.asarray(columns[field]).tolist() for field in fields}
+    return {row: rule['text'].format(**{field: values[field][row] for field in fields}) for row in np.flatnonzero(mask)}
+
+
+def recommend_batch(columns, predictions, rules=RULES):
+    """Return (recommendation lists, grade levels, grade colors) for a whole cohort"""
+    masks = rule_masks(columns, predictions, rules)
+    table = list(rules) + [FALLBACK]
+    categories = [rule['category'] for rule in table]
+    texts = [_rule_texts(rule, columns, masks[:, i]) for i, rule in enumerate(table)]
+    recommendations = [
+        [
+            {'category': categories[i], 'text': texts[i] if isinstance(texts[i], str) else texts[i][row]}
+            for i, fired in enumerate(row_mask) if fired
+        ]
+        for row, row_mask in enumerate(masks.tolist())
+    ]
+    levels, colors = grade_bands(predictions)
+    return recommendations, levels, colors
+
+
+def generate_recommendations(input_dict, prediction):
+    """Generate personalized recommendations based on student inputs and predicted grade"""
+    columns = {field: [input_dict[field]] for field in RULE_FIELDS}
+    recommendations, _, _ = recommend_batch(columns, [prediction])
+
+    # Grade-based overall assessment
+    grade_level, grade_color = grade_band(prediction)
+    return recommendations[0], grade_level, grade_color
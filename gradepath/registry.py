@@ -0,0 +1,232 @@
+"""Process-wide registry that loads the trained pipeline once and hot-reloads it."""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+from gradepath import metrics
+from gradepath.forest import CompiledModel
+
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'student_model.joblib')
+
+# Serve from a memory-mapped bundle shared with the host's other worker processes
+MODEL_MMAP = os.environ.get('GRADEPATH_MODEL_MMAP', '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+logger = logging.getLogger(__name__)
+
+
+def rss_bytes():
+    """Return the resident set size of this process, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def metadata_path(model_path):
+    """Return the path of the JSON metadata sidecar written next to a model file"""
+    return os.path.splitext(model_path)[0] + '.json'
+
+
+def read_metadata(model_path, digest=None):
+    """Return the model's sidecar metadata, or None if it is missing, unreadable or for another file"""
+    try:
+        with open(metadata_path(model_path), encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if digest is not None and metadata.get('model_sha256') != digest:
+        return None
+    return metadata
+
+
+class ModelRegistry:
+    """Holds one shared copy of the pipeline and swaps it when the file changes.
+
+    Readers always get the current pipeline object without waiting; a reload
+    builds the new pipeline and its compiled form off to the side and
+    publishes them together in one assignment, so predictions already running
+    keep using the old pair and no reader ever sees one without the other.
+
+    With ``mmap=True`` the pipeline is never unpickled in this process: the
+    model is a CompiledModel over the file's memory-mapped bundle (see
+    gradepath.shared), and get() returns that instead. ``bundle_dir``
+    overrides where bundles are written. If the bundle cannot be written or
+    read, the pipeline is loaded as usual.
+    """
+
+    def __init__(self, path=MODEL_PATH, poll_interval=2.0, mmap=MODEL_MMAP, bundle_dir=None):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.mmap = mmap
+        self.bundle_dir = bundle_dir
+        self._loaded = None  # (pipeline or bundle CompiledModel, CompiledModel or None)
+        self._mtime = None
+        self._digest = None
+        self._load_lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+        self._stop = threading.Event()
+        self.load_seconds = None
+        self.memory_bytes = None
+        self.loaded_at = None
+        self.load_count = 0
+        self.metadata = None
+
+    @property
+    def version(self):
+        """Short content hash identifying the loaded model file"""
+        return self._digest[:12] if self._digest else None
+
+    def _current(self):
+        loaded = self._loaded
+        if loaded is None:
+            with self._load_lock:
+                if self._loaded is None:
+                    self._load(os.stat(self.path).st_mtime_ns, file_digest(self.path))
+            loaded = self._loaded
+        self._start_watcher()
+        return loaded
+
+    def get(self):
+        """Return the current pipeline (the compiled model when memory-mapped), loading it on first use"""
+        return self._current()[0]
+
+    def predictor(self):
+        """Return the fastest available object with the pipeline's ``predict``"""
+        model, compiled = self._current()
+        return compiled if compiled is not None else model
+
+    def predict_records(self, records):
+        """Predict G3 for one ``input_dict`` or a list of them"""
+        predictor = self.predictor()
+        if isinstance(predictor, CompiledModel):
+            return predictor.predict_records(records)
+        return predictor.predict(pd.DataFrame([records] if hasattr(records, 'keys') else list(records)))
+
+    def _load_bundle(self, digest):
+        from gradepath import shared
+
+        try:
+            return shared.load_bundle(shared.ensure_bundle(self.path, digest, self.bundle_dir or shared.BUNDLE_DIR))
+        except (AttributeError, TypeError, ValueError, OSError):
+            # A read-only model directory, for one; set GRADEPATH_MODEL_BUNDLE_DIR
+            logger.warning("Could not build a bundle for %s; loading the pipeline", self.path, exc_info=True)
+            return None
+
+    def _load(self, mtime, digest):
+        before = rss_bytes()
+        start = time.perf_counter()
+        model = self._load_bundle(digest) if self.mmap else None
+        if model is None:
+            model = joblib.load(self.path)
+        elapsed = time.perf_counter() - start
+        after = rss_bytes()
+        if isinstance(model, CompiledModel):
+            compiled = model
+        else:
+            try:
+                compiled = CompiledModel.from_pipeline(model)
+            except (AttributeError, TypeError, ValueError):
+                logger.warning("Could not compile %s; predicting through the pipeline", self.path, exc_info=True)
+                compiled = None
+
+        self.metadata = read_metadata(self.path, digest)
+        self._loaded = (model, compiled)
+        self._mtime = mtime
+        self._digest = digest
+        self.load_seconds = elapsed
+        # Resident memory growth during the load; approximate under concurrent work
+        self.memory_bytes = max(after - before, 0) if before is not None and after is not None else None
+        self.loaded_at = time.time()
+        self.load_count += 1
+        logger.info("Loaded %s (version %s) in %.3fs", self.path, self.version, elapsed)
+        metrics.inc('gradepath_model_loads_total')
+        metrics.observe('gradepath_model_load_seconds', elapsed)
+
+        if self.load_count > 1:
+            for callback in list(self._listeners):
+                try:
+                    callback(self)
+                except Exception:
+                    logger.exception("Model reload listener failed")
+
+    def check(self):
+        """Reload the pipeline if the file's mtime and content hash changed; return True on reload"""
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return False
+        digest = file_digest(self.path)
+        with self._load_lock:
+            if digest == self._digest:
+                self._mtime = mtime
+                return False
+            self._load(mtime, digest)
+        return True
+
+    def add_listener(self, callback):
+        """Register a callable invoked with the registry each time a changed model file is reloaded"""
+        self._listeners.append(callback)
+
+    def _start_watcher(self):
+        if self._watcher is not None or self.poll_interval is None:
+            return
+        with self._load_lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, name="gradepath-model-watcher", daemon=True)
+                self._watcher.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception:
+                # Keep serving the last good model if the file is mid-write or broken
+                logger.exception("Model reload failed; keeping version %s", self.version)
+
+    def stop(self):
+        """Stop the background file watcher"""
+        self._stop.set()
+
+    def stats(self):
+        """Return load time, memory footprint and version of the current model"""
+        return {
+            'path': self.path,
+            'version': self.version,
+            'load_seconds': self.load_seconds,
+            'memory_bytes': self.memory_bytes,
+            'loaded_at': self.loaded_at,
+            'load_count': self.load_count,
+            'mmap': self._loaded is not None and isinstance(self._loaded[0], CompiledModel),
+            'metadata': self.metadata,
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the registry shared by every session in this process"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,50 @@
+"""Plain-text prediction reports, rendered from templates, for download, email and bulk export."""
+import functools
+import string
+import urllib.parse
+
+import pandas as pd
+
+
+REPORT_SUBJECT = "Student Achievement Prediction Report"
+
+REPORT_TEMPLATE = string.Template("""Student Achievement Prediction Report
+=====================================
+
+PREDICTION RESULT:
+Final Grade (G3): $prediction/20
+Performance Level: $grade_level
+
+STUDENT PROFILE:
+$profile
+${recommendations}
+Generated on: $generated_on
+Report generated by GradePath - Student Achievement Predictor""")
+
+RECOMMENDATIONS_TEMPLATE = string.Template("""
+RECOMMENDATIONS:
+$items
+""")
+
+
+def build_report(prediction, grade_level, input_dict, generated_on=None, recommendations=None):
+    """Return the text report for one student's prediction, optionally with its recommendations"""
+    if generated_on is None:
+        generated_on = pd.Timestamp.now()
+    section = ''
+    if recommendations:
+        items = '\n'.join(f"- {rec['category']}: {rec['text']}" for rec in recommendations)
+        section = RECOMMENDATIONS_TEMPLATE.substitute(items=items)
+    return REPORT_TEMPLATE.substitute(
+        prediction=f"{prediction:.2f}",
+        grade_level=grade_level,
+        profile='\n'.join(f"{k}: {v}" for k, v in input_dict.items()),
+        recommendations=section,
+        generated_on=generated_on.strftime('%Y-%m-%d %H:%M:%S'),
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def mailto_link(body, subject=REPORT_SUBJECT):
+    """Return a mailto: URL carrying the report; the quoting is cached per report text"""
+    return f"mailto:?subject={urllib.parse.quote(subject)}&body={urllib.parse.quote(body)}"
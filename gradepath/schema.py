@@ -0,0 +1,103 @@
+"""Input schema of the prediction form: the 32 fields and their value domains."""
+import pandas as pd
+
+
+# Same order as the input_dict built from the prediction form
+FEATURE_COLUMNS = [
+    'school', 'sex', 'age', 'address', 'famsize', 'Pstatus', 'Medu', 'Fedu', 'Mjob', 'Fjob', 'reason', 'guardian',
+    'traveltime', 'studytime', 'failures', 'schoolsup', 'famsup', 'paid', 'activities', 'nursery', 'higher',
+    'internet', 'romantic', 'famrel', 'freetime', 'goout', 'Dalc', 'Walc', 'health', 'absences', 'G1', 'G2',
+]
+
+YES_NO = ['yes', 'no']
+
+CATEGORICAL_VALUES = {
+    'school': ['GP', 'MS'],
+    'sex': ['F', 'M'],
+    'address': ['U', 'R'],
+    'famsize': ['LE3', 'GT3'],
+    'Pstatus': ['T', 'A'],
+    'Mjob': ['teacher', 'health', 'services', 'at_home', 'other'],
+    'Fjob': ['teacher', 'health', 'services', 'at_home', 'other'],
+    'reason': ['home', 'reputation', 'course', 'other'],
+    'guardian': ['mother', 'father', 'other'],
+    'schoolsup': YES_NO,
+    'famsup': YES_NO,
+    'paid': YES_NO,
+    'activities': YES_NO,
+    'nursery': YES_NO,
+    'higher': YES_NO,
+    'internet': YES_NO,
+    'romantic': YES_NO,
+}
+
+# Inclusive (min, max) of the form's number inputs and sliders
+NUMERIC_RANGES = {
+    'age': (15, 25),
+    'Medu': (0, 4),
+    'Fedu': (0, 4),
+    'traveltime': (1, 4),
+    'studytime': (1, 4),
+    'failures': (0, 3),
+    'famrel': (1, 5),
+    'freetime': (1, 5),
+    'goout': (1, 5),
+    'Dalc': (1, 5),
+    'Walc': (1, 5),
+    'health': (1, 5),
+    'absences': (0, 100),
+    'G1': (0, 20),
+    'G2': (0, 20),
+}
+
+
+def missing_columns(columns):
+    """Return the form fields absent from a list of column names"""
+    present = set(columns)
+    return [c for c in FEATURE_COLUMNS if c not in present]
+
+
+def validate_frame(df):
+    """Validate a roster DataFrame column by column.
+
+    Returns the cleaned frame (feature columns only, numerics as int64), a
+    boolean Series marking valid rows, and a dict mapping each column to the
+    number of rows it rejected.
+    """
+    missing = missing_columns(df.columns)
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    clean = pd.DataFrame(index=df.index)
+    valid = pd.Series(True, index=df.index)
+    errors = {}
+    for col in FEATURE_COLUMNS:
+        if col in CATEGORICAL_VALUES:
+            values = df[col].astype('string').str.strip()
+            ok = values.isin(CATEGORICAL_VALUES[col]).fillna(False).astype(bool)
+            clean[col] = values.astype(object)
+        else:
+            low, high = NUMERIC_RANGES[col]
+            values = pd.to_numeric(df[col], errors='coerce')
+            ok = (values.notna() & (values % 1 == 0) & values.between(low, high)).astype(bool)
+            clean[col] = values.where(ok, low).astype('int64')
+        if not ok.all():
+            errors[col] = int((~ok).sum())
+        valid &= ok
+    return clean, valid, errors
+
+
+def validate_record(record):
+    """Return a list of problems with one input_dict-style mapping (empty when valid)"""
+    if not hasattr(record, 'keys'):
+        return ["Expected an object with the 32 form fields"]
+    problems = [f"{c}: missing" for c in missing_columns(record.keys())]
+    for col, allowed in CATEGORICAL_VALUES.items():
+        if col in record and record[col] not in allowed:
+            problems.append(f"{col}: expected one of {', '.join(allowed)}")
+    for col, (low, high) in NUMERIC_RANGES.items():
+        value = record.get(col)
+        if col in record and (isinstance(value, bool) or not isinstance(value, (int, float))
+                              or not low <= value <= high or value != int(value)):
+            problems.append(f"{col}: expected a whole number from {low} to {high}")
+    return problems
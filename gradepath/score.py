@@ -0,0 +1,171 @@
+"""Headless roster scorer.
+
+Streams a CSV or Parquet roster in fixed-size chunks through a pool of worker
+processes, each holding its own copy of the pipeline, and streams predictions,
+grade levels and recommendation categories to the output file in input order.
+
+    python -m gradepath.score roster.csv scored.csv --workers 8 --chunk-size 20000
+"""
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from gradepath.batch import DEFAULT_CHUNK_SIZE, read_roster, roster_format
+from gradepath.forest import CompiledModel
+from gradepath.recommendations import RULE_CATEGORIES, grade_bands, rule_masks
+from gradepath.registry import MODEL_PATH
+from gradepath.schema import validate_frame
+
+
+_worker_model = None
+
+
+def _init_worker(model_path):
+    global _worker_model
+    pipeline = joblib.load(model_path)
+    try:
+        _worker_model = CompiledModel.from_pipeline(pipeline)
+    except (AttributeError, TypeError, ValueError):
+        _worker_model = pipeline
+
+
+def score_chunk(chunk, id_column=None):
+    """Score one raw roster chunk in a worker; returns (output_frame, rejected_rows, column_errors)"""
+    clean, valid, errors = validate_frame(chunk)
+    clean = clean[valid]
+    predictions = _worker_model.predict(clean) if len(clean) else np.empty(0)
+
+    levels, _ = grade_bands(predictions)
+    masks = rule_masks(clean, predictions)
+    categories = ['; '.join(itertools.compress(RULE_CATEGORIES, row)) for row in masks.tolist()]
+
+    out = pd.DataFrame({'row': clean.index}, index=clean.index)
+    if id_column:
+        out[id_column] = chunk.loc[clean.index, id_column]
+    out['predicted_G3'] = predictions
+    out['grade_level'] = levels.astype(object)
+    out['recommendations'] = pd.Series(categories, index=clean.index, dtype=object)
+    return out.reset_index(drop=True), int((~valid).sum()), errors
+
+
+class _Writer:
+    """Appends output chunks to a CSV (or stdout) or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.fmt = 'csv' if path == '-' else roster_format(path)
+        self._parquet = None
+        self._empty = None
+        self._header = True
+        self._file = sys.stdout if path == '-' else None
+
+    def write(self, df):
+        if self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if not len(df):
+                # Arrow types an empty text column as null, which does not match the
+                # file's schema; kept only in case no chunk has a valid row
+                self._empty = df
+                return
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            if self._file is None:
+                self._file = open(self.path, 'w', newline='', encoding='utf-8')
+            df.to_csv(self._file, index=False, header=self._header)
+            self._header = False
+
+    def close(self):
+        if self._parquet is None and self._empty is not None:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            # No row was valid: still leave a file with the output columns
+            pq.write_table(pa.Table.from_pandas(self._empty, preserve_index=False), self.path)
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+
+
+def run(input_path, output_path, model_path=MODEL_PATH, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, id_column=None):
+    """Score input_path into output_path; returns a summary dict"""
+    workers = workers or os.cpu_count() or 1
+    # At most two chunks per worker are queued or in flight, bounding memory
+    max_pending = workers * 2
+    start = time.perf_counter()
+    scored = rejected = 0
+    column_errors = collections.Counter()
+    writer = _Writer(output_path)
+
+    def drain(pending):
+        nonlocal scored, rejected
+        out, bad, errors = pending.popleft().result()
+        writer.write(out)
+        scored += len(out)
+        rejected += bad
+        column_errors.update(errors)
+
+    offset = 0
+    pending = collections.deque()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+            for chunk in read_roster(input_path, roster_format(input_path), chunk_size):
+                if id_column and id_column not in chunk.columns:
+                    raise ValueError(f"ID column {id_column!r} not found in {input_path}")
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+                offset += len(chunk)
+                pending.append(pool.submit(score_chunk, chunk, id_column))
+                if len(pending) >= max_pending:
+                    drain(pending)
+            while pending:
+                drain(pending)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': offset,
+        'scored': scored,
+        'rejected': rejected,
+        'column_errors': dict(column_errors),
+        'seconds': elapsed,
+        'rows_per_second': offset / elapsed if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gradepath.score", description="Score a student roster with the GradePath model.")
+    parser.add_argument("input", help="roster file (.csv or .parquet) with the prediction form's 32 columns")
+    parser.add_argument("output", help="output file (.csv or .parquet), or - for CSV on stdout")
+    parser.add_argument("--model", default=MODEL_PATH, help="path to the trained pipeline (default: %(default)s)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per chunk (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--id-column", default=None, help="input column copied to the output to identify students")
+    args = parser.parse_args(argv)
+
+    summary = run(args.input, args.output, args.model, args.chunk_size, args.workers, args.id_column)
+    print(
+        f"Scored {summary['scored']:,} of {summary['rows']:,} rows in {summary['seconds']:.1f}s "
+        f"({summary['rows_per_second']:,.0f} rows/s); {summary['rejected']:,} rejected",
+        file=sys.stderr,
+    )
+    for col, count in sorted(summary['column_errors'].items()):
+        print(f"  {col}: {count:,} invalid values", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""Memory-mapped model bundles shared by every worker process on a host.
+
+Unpickling the pipeline gives each process a private copy of every tree. A
+bundle stores what CompiledModel needs as plain ``.npy`` files: the
+FlatForest's node arrays and the FeatureEncoder's tables. They are opened
+with ``np.load(mmap_mode='r')``, so loading maps the files instead of
+reading them. Pages are faulted in on first use and stay in the page cache,
+where every process mapping the same bundle shares one physical copy.
+
+A bundle is written once per model file content, into a directory named after
+the file's hash, and is never modified afterwards. Bundles go next to the
+model unless ``GRADEPATH_MODEL_BUNDLE_DIR`` names a writable directory, as it
+must when the model ships on a read-only filesystem. A worker
+that starts while the model is being hot-reloaded therefore never sees a
+half-written bundle. Set ``GRADEPATH_MODEL_MMAP=1`` to have the registry
+serve from bundles; the first worker to load a new model writes its bundle.
+
+    python -m gradepath.shared                  # write the bundle for the shipped model
+    python -m gradepath.shared --bundle-dir /var/cache/gradepath
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from gradepath.encoding import FeatureEncoder
+from gradepath.forest import NODE_ARRAYS, CompiledModel, FlatForest
+
+
+BUNDLE_FORMAT = 1
+FOREST_ARRAYS = NODE_ARRAYS + ('roots', 'children', 'cover')
+ENCODER_ARRAYS = ('numeric_index', 'numeric_mean', 'numeric_scale')
+MANIFEST = 'bundle.json'
+
+# Where bundles are written; empty means next to the model file
+BUNDLE_DIR = os.environ.get('GRADEPATH_MODEL_BUNDLE_DIR', '').strip() or None
+
+logger = logging.getLogger(__name__)
+
+
+def _bundle_prefix(model_path, directory=None):
+    stem = os.path.splitext(model_path)[0]
+    return os.path.join(directory, os.path.basename(stem)) if directory else stem
+
+
+def bundle_path(model_path, digest, directory=None):
+    """Return the bundle directory for a model file with the given sha256 digest, inside directory if given"""
+    return f"{_bundle_prefix(model_path, directory)}.{digest[:12]}.bundle"
+
+
+def write_bundle(compiled, directory, digest=None):
+    """Write a CompiledModel's arrays to directory, unless another process already has; returns directory"""
+    forest, encoder = compiled.forest, compiled.encoder
+    if forest.cover is None:
+        raise ValueError("The flattened forest has no node cover; flatten it with FlatForest.from_regressor")
+    parent = os.path.dirname(os.path.abspath(directory))
+    tmp = tempfile.mkdtemp(prefix='.bundle-', dir=parent)
+    try:
+        for name in FOREST_ARRAYS:
+            np.save(os.path.join(tmp, name + '.npy'), np.ascontiguousarray(getattr(forest, name)))
+        for name in ENCODER_ARRAYS:
+            np.save(os.path.join(tmp, name + '.npy'), getattr(encoder, name))
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'model_sha256': digest,
+            'depth': forest.depth,
+            'n_features': forest.n_features,
+            'n_encoded_features': encoder.n_features,
+            'numeric_columns': encoder.numeric_columns,
+            'categorical': [[column, list(lookup.items()), handle_unknown]
+                            for column, lookup, handle_unknown in encoder.categorical],
+        }
+        with open(os.path.join(tmp, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.rename(tmp, directory)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isfile(os.path.join(directory, MANIFEST)):
+            raise
+        # Another worker finished the same bundle first
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return directory
+
+
+def load_bundle(directory, mmap_mode='r'):
+    """Return a CompiledModel whose forest arrays are memory-mapped from a bundle directory"""
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')!r} in {directory}")
+    arrays = {name: np.load(os.path.join(directory, name + '.npy'), mmap_mode=mmap_mode)
+              for name in FOREST_ARRAYS + ENCODER_ARRAYS}
+    forest = FlatForest(
+        **{name: arrays[name] for name in FOREST_ARRAYS},
+        depth=manifest['depth'],
+        n_features=manifest['n_features'],
+    )
+    # The encoder tables are a few hundred bytes; FeatureEncoder keeps its own copy
+    encoder = FeatureEncoder(
+        manifest['n_encoded_features'],
+        list(zip(manifest['numeric_columns'], arrays['numeric_index'], arrays['numeric_mean'], arrays['numeric_scale'])),
+        [(column, dict((value, index) for value, index in lookup), handle_unknown)
+         for column, lookup, handle_unknown in manifest['categorical']],
+    )
+    return CompiledModel(encoder, None, forest)
+
+
+def remove_stale_bundles(model_path, keep):
+    """Delete bundles of earlier versions of a model file; processes still mapping them are unaffected"""
+    removed = []
+    prefix = _bundle_prefix(model_path, os.path.dirname(keep))
+    for directory in glob.glob(glob.escape(prefix) + '.*.bundle'):
+        if os.path.abspath(directory) != os.path.abspath(keep):
+            shutil.rmtree(directory, ignore_errors=True)
+            removed.append(directory)
+    return removed
+
+
+def ensure_bundle(model_path, digest, bundle_dir=BUNDLE_DIR):
+    """Return the bundle directory for a model file, writing it from the pickled pipeline if needed"""
+    import joblib
+
+    directory = bundle_path(model_path, digest, bundle_dir)
+    if not os.path.isfile(os.path.join(directory, MANIFEST)):
+        if bundle_dir:
+            os.makedirs(bundle_dir, exist_ok=True)
+        start = time.perf_counter()
+        write_bundle(CompiledModel.from_pipeline(joblib.load(model_path)), directory, digest)
+        logger.info("Wrote model bundle %s in %.2fs", directory, time.perf_counter() - start)
+        remove_stale_bundles(model_path, directory)
+    return directory
+
+
+def main(argv=None):
+    from gradepath.registry import MODEL_PATH, file_digest
+
+    parser = argparse.ArgumentParser(prog="python -m gradepath.shared",
+                                     description="Write the memory-mappable bundle for a trained GradePath model.")
+    parser.add_argument("--model", default=MODEL_PATH, help="path to the trained pipeline (default: %(default)s)")
+    parser.add_argument("--bundle-dir", default=BUNDLE_DIR,
+                        help="directory to write the bundle to (default: next to the model)")
+    args = parser.parse_args(argv)
+
+    directory = ensure_bundle(args.model, file_digest(args.model), args.bundle_dir)
+    size = sum(os.path.getsize(path) for path in glob.glob(os.path.join(directory, '*')))
+    print(f"{directory} ({size / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Reproducible training of the GradePath pipeline with a size/latency-aware search.
+
+Rebuilds the ColumnTransformer (OneHotEncoder + StandardScaler) and
+RandomForestRegressor pipeline from a student CSV such as the UCI
+``student-mat.csv``. It searches n_estimators, max_depth and min_samples_leaf
+in parallel, with results cached on disk. Every candidate is scored on
+cross-validated accuracy, single-row and batch latency and serialized size.
+The smallest model whose RMSE is within the tolerance of the best one is
+written, next to a JSON metadata sidecar.
+
+    python -m gradepath.train --data student-mat.csv --output student_model.joblib
+"""
+import argparse
+import copy
+import datetime
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from gradepath.forest import CompiledModel
+from gradepath.registry import file_digest, metadata_path
+from gradepath.schema import CATEGORICAL_VALUES, FEATURE_COLUMNS, validate_frame
+
+
+METADATA_VERSION = 1
+TARGET = 'G3'
+SEED = 42
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'gradepath-train')
+
+N_ESTIMATORS = (25, 50, 100, 200)
+MAX_DEPTH = (None, 8, 12, 16)
+MIN_SAMPLES_LEAF = (1, 2, 4)
+
+# Same column split as the shipped pipeline
+CATEGORICAL_COLUMNS = [c for c in FEATURE_COLUMNS if c in CATEGORICAL_VALUES]
+NUMERIC_COLUMNS = [c for c in FEATURE_COLUMNS if c not in CATEGORICAL_VALUES]
+
+
+def load_dataset(path, sep=None):
+    """Read a student CSV and return (features, G3, rejected row count)"""
+    # sep=None sniffs the delimiter; the UCI files use ';'
+    raw = pd.read_csv(path, sep=sep, engine='python' if sep is None else 'c', dtype=str)
+    raw.columns = [c.strip() for c in raw.columns]
+    if TARGET not in raw.columns:
+        raise ValueError(f"{path} has no {TARGET} column")
+    features, valid, _ = validate_frame(raw)
+    target = pd.to_numeric(raw[TARGET].str.strip(), errors='coerce')
+    valid &= target.between(0, 20)
+    features = features[valid].reset_index(drop=True)
+    target = target[valid].to_numpy(dtype=np.float64)
+    if len(features) < 10:
+        raise ValueError(f"{path} has only {len(features)} valid rows")
+    return features, target, int((~valid).sum())
+
+
+def build_pipeline(n_estimators=100, max_depth=None, min_samples_leaf=1, random_state=SEED):
+    """Return an unfitted pipeline with the same layout as the shipped model"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = ColumnTransformer([
+        ('cat', OneHotEncoder(handle_unknown='ignore'), CATEGORICAL_COLUMNS),
+        ('num', StandardScaler(), NUMERIC_COLUMNS),
+    ])
+    regressor = RandomForestRegressor(
+        n_estimators=n_estimators, max_depth=max_depth, min_samples_leaf=min_samples_leaf,
+        random_state=random_state, n_jobs=1,
+    )
+    return Pipeline([('preprocessor', preprocessor), ('regressor', regressor)])
+
+
+def _grow(pipeline, X, y, sizes):
+    """Fit pipeline with warm_start at each forest size; yields after every size.
+
+    A forest grown to n trees this way is identical to one fitted from scratch
+    with n_estimators=n and the same random_state.
+    """
+    pipeline.set_params(regressor__warm_start=True)
+    for n in sizes:
+        pipeline.set_params(regressor__n_estimators=n)
+        pipeline.fit(X, y)
+        yield n
+
+
+def fit_candidates(X, y, max_depth, min_samples_leaf, sizes, folds=5, seed=SEED):
+    """Cross-validate and refit one (max_depth, min_samples_leaf) pair at every forest size.
+
+    Returns a list of (params, out-of-fold metrics, pipeline fitted on all rows).
+    """
+    from sklearn.model_selection import KFold
+
+    sizes = sorted(sizes)
+    oof = np.zeros((len(sizes), len(y)))
+    for train, test in KFold(folds, shuffle=True, random_state=seed).split(X):
+        pipeline = build_pipeline(max_depth=max_depth, min_samples_leaf=min_samples_leaf, random_state=seed)
+        for i, _ in enumerate(_grow(pipeline, X.iloc[train], y[train], sizes)):
+            oof[i, test] = pipeline.predict(X.iloc[test])
+
+    results = []
+    pipeline = build_pipeline(max_depth=max_depth, min_samples_leaf=min_samples_leaf, random_state=seed)
+    for i, n in enumerate(_grow(pipeline, X, y, sizes)):
+        error = oof[i] - y
+        scores = {
+            'rmse': float(np.sqrt(np.mean(error ** 2))),
+            'mae': float(np.mean(np.abs(error))),
+            'r2': float(1 - np.sum(error ** 2) / np.sum((y - y.mean()) ** 2)),
+        }
+        fitted = copy.deepcopy(pipeline)
+        fitted.set_params(regressor__warm_start=False)
+        params = {'n_estimators': n, 'max_depth': max_depth, 'min_samples_leaf': min_samples_leaf}
+        results.append((params, scores, fitted))
+    return results
+
+
+def serialized_size(pipeline):
+    """Return the size in bytes of the pipeline as written by joblib.dump"""
+    buffer = io.BytesIO()
+    joblib.dump(pipeline, buffer)
+    return buffer.tell()
+
+
+def measure_latency(pipeline, X, single_calls=200, batch_rows=1000, repeat=5):
+    """Return (median single-row seconds, best batch seconds) on the serving predictor"""
+    try:
+        predictor = CompiledModel.from_pipeline(pipeline)
+        records = X.iloc[:single_calls].to_dict('records')
+    except (AttributeError, TypeError, ValueError):
+        predictor, records = None, None
+
+    timings = []
+    for i in range(single_calls):
+        start = time.perf_counter()
+        if predictor is not None:
+            predictor.predict_records(records[i % len(records)])
+        else:
+            pipeline.predict(X.iloc[[i % len(X)]])
+        timings.append(time.perf_counter() - start)
+
+    batch = X.iloc[np.arange(batch_rows) % len(X)].reset_index(drop=True)
+    model = predictor if predictor is not None else pipeline
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(batch)
+        best = min(best, time.perf_counter() - start)
+    return float(np.median(timings)), best
+
+
+def search(X, y, n_estimators=N_ESTIMATORS, max_depth=MAX_DEPTH, min_samples_leaf=MIN_SAMPLES_LEAF,
+           folds=5, seed=SEED, jobs=None, cache_dir=DEFAULT_CACHE_DIR, batch_rows=1000):
+    """Evaluate the full grid; returns (results DataFrame, {row index: fitted pipeline})"""
+    fit = fit_candidates
+    if cache_dir:
+        fit = joblib.Memory(cache_dir, verbose=0).cache(fit_candidates)
+    tasks = [joblib.delayed(fit)(X, y, depth, leaf, tuple(n_estimators), folds, seed)
+             for depth in max_depth for leaf in min_samples_leaf]
+    # Accuracy runs in parallel; latency is timed afterwards, one model at a time
+    batches = joblib.Parallel(n_jobs=jobs or -1)(tasks)
+
+    rows, pipelines = [], {}
+    for params, scores, pipeline in (candidate for batch in batches for candidate in batch):
+        single, batch_seconds = measure_latency(pipeline, X, batch_rows=batch_rows)
+        forest = pipeline.steps[-1][1]
+        pipelines[len(rows)] = pipeline
+        rows.append({
+            **params, **scores,
+            'nodes': int(sum(tree.tree_.node_count for tree in forest.estimators_)),
+            'size_bytes': serialized_size(pipeline),
+            'single_ms': single * 1e3,
+            'batch_ms': batch_seconds * 1e3,
+        })
+    results = pd.DataFrame(rows)
+    results['max_depth'] = results['max_depth'].astype('Int64')
+    return results, pipelines
+
+
+def select(results, tolerance):
+    """Return the index of the smallest model whose RMSE is within tolerance (a fraction) of the best"""
+    limit = results['rmse'].min() * (1 + tolerance)
+    eligible = results[results['rmse'] <= limit]
+    return eligible.sort_values(['size_bytes', 'single_ms', 'rmse']).index[0]
+
+
+def _versions():
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scikit-learn': sklearn.__version__,
+        'joblib': joblib.__version__,
+    }
+
+
+def write_model(pipeline, path, metadata):
+    """Write the pipeline and its sidecar; the model file is replaced atomically.
+
+    The sidecar is written first so a hot-reloading registry never sees a new
+    model with stale metadata.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.joblib.tmp')
+    os.close(fd)
+    try:
+        joblib.dump(pipeline, tmp)
+        metadata = {**metadata, 'model_sha256': file_digest(tmp), 'size_bytes': os.path.getsize(tmp)}
+        sidecar = metadata_path(path)
+        with open(sidecar + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+            f.write('\n')
+        os.replace(sidecar + '.tmp', sidecar)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return metadata
+
+
+def train(data_path, output_path, sep=None, tolerance=0.02, folds=5, seed=SEED, jobs=None,
+          cache_dir=DEFAULT_CACHE_DIR, report_path=None, **grid):
+    """Run the search, write the selected model and sidecar; returns (metadata, results)"""
+    X, y, rejected = load_dataset(data_path, sep)
+    results, pipelines = search(X, y, folds=folds, seed=seed, jobs=jobs, cache_dir=cache_dir, **grid)
+    chosen = select(results, tolerance)
+    if report_path:
+        results.to_csv(report_path, index=False)
+
+    row = results.loc[chosen]
+    params = {k: (None if pd.isna(row[k]) else int(row[k])) for k in ('n_estimators', 'max_depth', 'min_samples_leaf')}
+    metadata = {
+        'metadata_version': METADATA_VERSION,
+        'trained_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'data': {
+            'path': os.path.basename(data_path),
+            'sha256': file_digest(data_path),
+            'rows': len(X),
+            'rejected_rows': rejected,
+        },
+        'features': FEATURE_COLUMNS,
+        'target': TARGET,
+        'params': params,
+        'random_state': seed,
+        'cv': {'folds': folds, **{k: float(row[k]) for k in ('rmse', 'mae', 'r2')}},
+        'selection': {'tolerance': tolerance, 'best_rmse': float(results['rmse'].min()), 'candidates': len(results)},
+        'latency_ms': {'single_row': float(row['single_ms']), 'batch_1000': float(row['batch_ms'])},
+        'versions': _versions(),
+    }
+    metadata = write_model(pipelines[chosen], output_path, metadata)
+    return metadata, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gradepath.train", description="Train the GradePath model.")
+    parser.add_argument("--data", required=True, help="student CSV with the form's 32 columns and G3")
+    parser.add_argument("--output", required=True, help="where to write the pipeline; metadata goes next to it as .json")
+    parser.add_argument("--sep", default=None, help="CSV delimiter (default: detected)")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="accepted RMSE increase over the best candidate, as a fraction (default: %(default)s)")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=SEED, help="random state for folds and forests (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=None, help="parallel search jobs (default: one per CPU)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="search cache, '' to disable (default: %(default)s)")
+    parser.add_argument("--report", default=None, help="write every candidate's scores to this CSV")
+    parser.add_argument("--n-estimators", type=int, nargs='+', default=list(N_ESTIMATORS))
+    parser.add_argument("--max-depth", type=lambda v: None if v.lower() == 'none' else int(v), nargs='+',
+                        default=list(MAX_DEPTH), help="use 'none' for unlimited depth")
+    parser.add_argument("--min-samples-leaf", type=int, nargs='+', default=list(MIN_SAMPLES_LEAF))
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    metadata, results = train(
+        args.data, args.output, args.sep, args.tolerance, args.folds, args.seed, args.jobs, args.cache_dir, args.report,
+        n_estimators=args.n_estimators, max_depth=args.max_depth, min_samples_leaf=args.min_samples_leaf,
+    )
+    columns = ['n_estimators', 'max_depth', 'min_samples_leaf', 'rmse', 'r2', 'size_bytes', 'single_ms', 'batch_ms']
+    print(results[columns].sort_values('rmse').to_string(index=False, float_format='{:.3f}'.format), file=sys.stderr)
+    print(
+        f"Selected {metadata['params']} (RMSE {metadata['cv']['rmse']:.3f}, "
+        f"{metadata['size_bytes'] / 1e6:.2f} MB, {metadata['latency_ms']['single_row']:.2f} ms/row) "
+        f"from {len(results)} candidates in {time.perf_counter() - start:.1f}s; wrote {args.output}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Model warm-up, startup timing breakdown and readiness.
+
+warm_up() front-loads everything a fresh process would otherwise pay on its
+first request. It imports the model's libraries, loads and compiles the
+pipeline, and runs a dummy prediction, recommendations and, optionally, an
+explanation. How long each stage took is kept for the startup report.
+ready() becomes true only once warm-up has finished.
+
+    python -m gradepath.warmup                                      # time a cold start in this process
+    python -m gradepath.warmup --check http://localhost:8501/ready  # readiness probe for a running server
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from gradepath import metrics
+from gradepath.schema import CATEGORICAL_VALUES, FEATURE_COLUMNS, NUMERIC_RANGES
+
+
+# Imported up front so neither the unpickle nor the first script run pays for them
+WARM_IMPORTS = (
+    'pandas',
+    'sklearn.compose',
+    'sklearn.ensemble',
+    'sklearn.pipeline',
+    'sklearn.preprocessing',
+    'gradepath.explain',
+    'gradepath.whatif',
+)
+
+# A valid profile: the first option of every field
+DUMMY_PROFILE = {
+    c: CATEGORICAL_VALUES[c][0] if c in CATEGORICAL_VALUES else NUMERIC_RANGES[c][0] for c in FEATURE_COLUMNS
+}
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_timings = {}
+_error = None
+_thread = None
+
+
+def process_seconds():
+    """Return seconds since this process started, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the parenthesized command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _timed(stage, fn):
+    start = time.perf_counter()
+    result = fn()
+    _timings[stage] = time.perf_counter() - start
+    metrics.observe('gradepath_startup_seconds', _timings[stage], stage=stage)
+    return result
+
+
+def _import_all():
+    for name in WARM_IMPORTS:
+        importlib.import_module(name)
+
+
+def warm_up(explain=True):
+    """Run the warm-up stages once per process; returns the startup report"""
+    global _error
+    from gradepath.forest import CompiledModel
+    from gradepath.recommendations import generate_recommendations
+    from gradepath.registry import get_registry
+
+    with _lock:
+        if _ready.is_set():
+            return startup_report()
+        start = time.perf_counter()
+        try:
+            _timed('imports', _import_all)
+            registry = get_registry()
+            _timed('model_load', registry.get)
+            predictions = _timed('first_predict', lambda: registry.predict_records(DUMMY_PROFILE))
+            _timed('recommendations', lambda: generate_recommendations(DUMMY_PROFILE, float(predictions[0])))
+            predictor = registry.predictor()
+            if explain and isinstance(predictor, CompiledModel):
+                from gradepath.explain import explain_records
+
+                _timed('explainer', lambda: explain_records(DUMMY_PROFILE, predictor))
+        except Exception as e:
+            _error = f"{type(e).__name__}: {e}"
+            logger.exception("Warm-up failed")
+            raise
+        _timings['total'] = time.perf_counter() - start
+        _error = None
+        _ready.set()
+    report = startup_report()
+    logger.info("Warm-up finished in %.2fs (%s)", _timings['total'],
+                ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in report['stages'].items()))
+    return report
+
+
+def _warm_up_quietly(explain):
+    try:
+        warm_up(explain)
+    except Exception:
+        pass  # already logged; ready() stays false
+
+
+def start_background(explain=True):
+    """Start warm-up on a daemon thread unless it already ran or is running"""
+    global _thread
+    if _ready.is_set() or _thread is not None:
+        return
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_warm_up_quietly, args=(explain,), name="gradepath-warmup", daemon=True)
+            _thread.start()
+
+
+def ready():
+    """Return True once warm-up has completed in this process"""
+    return _ready.is_set()
+
+
+def startup_report():
+    """Return readiness, the per-stage warm-up seconds and the process age"""
+    return {
+        'ready': _ready.is_set(),
+        'stages': dict(_timings),
+        'process_seconds': process_seconds(),
+        'error': _error,
+    }
+
+
+def check(url, timeout=2.0):
+    """Return (HTTP status, body) of a server's readiness endpoint, or (None, error text)"""
+    import urllib.error
+    import urllib.request
+
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, response.read().decode('utf-8', 'replace')
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode('utf-8', 'replace')
+    except (OSError, ValueError) as e:
+        return None, str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m gradepath.warmup",
+                                     description="Warm up the GradePath model and report startup timings.")
+    parser.add_argument("--check", metavar="URL", default=None,
+                        help="instead of warming up here, exit 0 only if URL (a /ready endpoint) answers 200")
+    parser.add_argument("--no-explain", action="store_true", help="skip building the explainer")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        status, body = check(args.check)
+        print(body if status is not None else f"{args.check}: {body}", file=sys.stderr)
+        return 0 if status == 200 else 1
+
+    report = warm_up(explain=not args.no_explain)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""The Streamlit app served as an ASGI application that is warm before it takes traffic.
+
+``streamlit run app.py`` only imports and loads anything once the first
+browser session runs the script. Here the model is warmed up in the server's
+lifespan, before uvicorn starts accepting connections. ``GET /ready`` answers
+200 with the startup breakdown once warm-up is done, and 503 before that.
+
+    python -m gradepath.web --port 8501
+    uvicorn gradepath.web:app --port 8501
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import sys
+
+import streamlit as st
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from gradepath import warmup
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+async def ready(request):
+    report = warmup.startup_report()
+    return JSONResponse(report, status_code=200 if report['ready'] else 503)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await asyncio.get_running_loop().run_in_executor(None, warmup.warm_up)
+    yield
+
+
+app = st.App(APP_PATH, lifespan=lifespan, routes=[Route('/ready', ready)])
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(prog="python -m gradepath.web", description="Serve the GradePath app, warmed up.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8501)
+    args = parser.parse_args(argv)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
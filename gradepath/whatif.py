@@ -0,0 +1,95 @@
+"""Counterfactual "what if" scenarios over the fields a student can act on.
+
+Every combination of realistic changes to the actionable fields is scored in
+one batched predict call. With the compiled model the base profile is encoded
+once and only the changed feature columns are rewritten, so a grid of a few
+thousand variants costs about as much as one large batch prediction.
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from gradepath.forest import CompiledModel
+
+
+ABSENCE_TARGETS = (0, 2, 4, 6, 8, 10, 15, 20, 30, 50)
+
+# Field -> function(current value) giving the values worth trying, current value included
+ACTIONABLE = {
+    'studytime': lambda current: list(range(current, 5)),
+    'absences': lambda current: [v for v in ABSENCE_TARGETS if v < current] + [current],
+    'goout': lambda current: list(range(1, current + 1)),
+    'Dalc': lambda current: list(range(1, current + 1)),
+    'Walc': lambda current: list(range(1, current + 1)),
+}
+
+FIELD_LABELS = {
+    'studytime': 'Study time',
+    'absences': 'Absences',
+    'goout': 'Going out',
+    'Dalc': 'Workday alcohol',
+    'Walc': 'Weekend alcohol',
+}
+
+
+def scenario_grid(input_dict, fields=ACTIONABLE):
+    """Return a DataFrame with one row per combination of values for the actionable fields"""
+    options = {field: values(int(input_dict[field])) for field, values in fields.items()}
+    grid = pd.DataFrame(list(itertools.product(*options.values())), columns=list(options))
+    changed = np.zeros(len(grid), dtype=np.int64)
+    for field in options:
+        changed += grid[field].to_numpy() != int(input_dict[field])
+    grid['changes'] = changed
+    return grid
+
+
+def _score_grid(predictor, input_dict, grid, fields):
+    if isinstance(predictor, CompiledModel):
+        encoder = predictor.encoder
+        X = np.repeat(encoder.encode(input_dict), len(grid), axis=0)
+        for field in fields:
+            index, mean, scale = encoder.numeric_column(field)
+            X[:, index] = (grid[field].to_numpy(dtype=np.float64) - mean) / scale
+        return predictor.predict_features(X)
+    profiles = pd.DataFrame([input_dict] * len(grid))
+    for field in fields:
+        profiles[field] = grid[field].to_numpy()
+    return predictor.predict(profiles)
+
+
+def explore(input_dict, predictor, fields=ACTIONABLE):
+    """Score every scenario for a student.
+
+    Returns (baseline prediction, DataFrame of scenarios) with a predicted G3
+    and delta per scenario, ranked by gain and then by how few fields change.
+    The unchanged profile is not included.
+    """
+    grid = scenario_grid(input_dict, fields)
+    grid['predicted_G3'] = _score_grid(predictor, input_dict, grid, list(fields))
+    baseline = float(grid.loc[grid['changes'] == 0, 'predicted_G3'].iloc[0])
+    grid['delta'] = grid['predicted_G3'] - baseline
+    grid = grid[grid['changes'] > 0]
+    return baseline, grid.sort_values(['delta', 'changes'], ascending=[False, True], kind='stable').reset_index(drop=True)
+
+
+def describe(row, input_dict, fields=ACTIONABLE):
+    """Human-readable summary of the changes in one scenario row"""
+    parts = [
+        f"{FIELD_LABELS.get(field, field)} {input_dict[field]} → {int(row[field])}"
+        for field in fields if row[field] != input_dict[field]
+    ]
+    return ', '.join(parts)
+
+
+def single_field_effects(scenarios, input_dict, fields=ACTIONABLE):
+    """Best scenario that changes only one field, for each actionable field"""
+    single = scenarios[scenarios['changes'] == 1]
+    rows = []
+    for field in fields:
+        moved = single[single[field] != input_dict[field]]
+        if len(moved):
+            best = moved.iloc[0]
+            rows.append({'field': FIELD_LABELS.get(field, field), 'change': describe(best, input_dict, fields),
+                         'delta': best['delta']})
+    return pd.DataFrame(rows, columns=['field', 'change', 'delta'])
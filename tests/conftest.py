@@ -0,0 +1,14 @@
+"""Shared setup for the test suite: run ``python -m pytest`` from the repository root."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The benchmark scripts import their helpers as top-level modules
+for path in (ROOT, os.path.join(ROOT, 'benchmarks')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def pytest_configure(config):
+    # The shipped model was pickled with an older scikit-learn
+    config.addinivalue_line('filterwarnings', 'ignore::sklearn.exceptions.InconsistentVersionWarning')
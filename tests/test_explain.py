@@ -0,0 +1,82 @@
+"""TreeSHAP attributions of gradepath.explain."""
+import itertools
+import math
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from common import random_records
+from gradepath.explain import ForestExplainer, explain_records
+from gradepath.forest import CompiledModel
+from gradepath.registry import MODEL_PATH
+
+
+@pytest.fixture(scope='module')
+def compiled():
+    return CompiledModel.from_pipeline(joblib.load(MODEL_PATH))
+
+
+def path_dependent_value(tree, x, known):
+    """Expected tree output with the features in known fixed to x and the rest following node cover"""
+    def visit(node):
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == -1:
+            return tree.value[node].item()
+        feature = tree.feature[node]
+        if feature in known:
+            value = x[feature]
+            went_left = tree.missing_go_to_left[node] if np.isnan(value) else value <= tree.threshold[node]
+            return visit(left if went_left else right)
+        cover = tree.weighted_n_node_samples
+        return (cover[left] * visit(left) + cover[right] * visit(right)) / cover[node]
+    return visit(0)
+
+
+def brute_force_shap(forest, x):
+    """Shapley values of the path-dependent game by enumerating every coalition"""
+    n = len(x)
+    phi = np.zeros(n)
+    for tree in (estimator.tree_ for estimator in forest.estimators_):
+        for i in range(n):
+            others = [j for j in range(n) if j != i]
+            for size in range(n):
+                weight = math.factorial(size) * math.factorial(n - size - 1) / math.factorial(n)
+                for subset in itertools.combinations(others, size):
+                    known = set(subset)
+                    phi[i] += weight * (path_dependent_value(tree, x, known | {i})
+                                        - path_dependent_value(tree, x, known))
+    return phi / len(forest.estimators_)
+
+
+def test_matches_brute_force_shapley_values():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 4)).astype(np.float32)
+    X[rng.random(200) < 0.1, 2] = np.nan
+    y = np.nan_to_num(X[:, 0]) * 2 + np.nan_to_num(X[:, 1]) * np.nan_to_num(X[:, 2]) + rng.normal(size=200)
+    forest = RandomForestRegressor(n_estimators=3, max_depth=5, random_state=0).fit(X, y)
+    explainer = ForestExplainer.from_regressor(forest)
+
+    rows = np.vstack([X[:6], [[0.1, -0.5, np.nan, 1.0]]])
+    phi = explainer.shap_values(rows)
+    expected = np.array([brute_force_shap(forest, row.astype(np.float64)) for row in rows])
+    np.testing.assert_allclose(phi, expected, atol=1e-10)
+    np.testing.assert_allclose(phi.sum(axis=1) + explainer.expected_value, forest.predict(rows), atol=1e-10)
+
+
+def test_attributions_add_up_to_each_prediction(compiled):
+    records = random_records(50, seed=4)
+    expected_value, predictions, attributions = explain_records(records, compiled)
+    np.testing.assert_allclose(attributions.sum(axis=1) + expected_value, predictions, atol=1e-9)
+
+    single_expected, single_prediction, single = explain_records(records[7], compiled)
+    assert single_expected == expected_value
+    np.testing.assert_allclose(single.iloc[0], attributions.iloc[7], atol=1e-12)
+    np.testing.assert_allclose(single.sum(axis=1) + single_expected, single_prediction, atol=1e-9)
+
+
+def test_chunking_does_not_change_attributions(compiled):
+    X = compiled.encoder.encode(random_records(20, seed=5))
+    explainer = ForestExplainer.from_forest(compiled.forest)
+    np.testing.assert_allclose(explainer.shap_values(X, max_elements=1), explainer.shap_values(X), atol=1e-12)
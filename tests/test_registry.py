@@ -0,0 +1,67 @@
+"""Model registry loading and hot reload."""
+import shutil
+
+import joblib
+import pytest
+
+from gradepath import registry as registry_module
+from gradepath.forest import CompiledModel
+from gradepath.registry import MODEL_PATH, ModelRegistry
+
+RECORD = {
+    'school': 'GP', 'sex': 'F', 'age': 17, 'address': 'U', 'famsize': 'GT3', 'Pstatus': 'T', 'Medu': 3, 'Fedu': 2,
+    'Mjob': 'services', 'Fjob': 'other', 'reason': 'course', 'guardian': 'mother', 'traveltime': 1,
+    'studytime': 2, 'failures': 0, 'schoolsup': 'no', 'famsup': 'yes', 'paid': 'no', 'activities': 'yes',
+    'nursery': 'yes', 'higher': 'yes', 'internet': 'yes', 'romantic': 'no', 'famrel': 4, 'freetime': 3,
+    'goout': 3, 'Dalc': 1, 'Walc': 2, 'health': 4, 'absences': 4, 'G1': 12, 'G2': 13,
+}
+
+
+@pytest.fixture
+def model_copy(tmp_path):
+    path = tmp_path / 'student_model.joblib'
+    shutil.copy(MODEL_PATH, path)
+    return path
+
+
+def rewrite_model(path):
+    """Write the same pipeline back with different bytes, so its digest changes"""
+    joblib.dump(joblib.load(path), path, compress=3)
+
+
+@pytest.mark.parametrize('mmap', [False, True])
+def test_predictor_is_consistent_during_reload(model_copy, tmp_path, monkeypatch, mmap):
+    registry = ModelRegistry(str(model_copy), poll_interval=None, mmap=mmap, bundle_dir=str(tmp_path / 'bundles'))
+    expected = registry.predict_records(RECORD)
+    old_version = registry.version
+
+    seen = []
+    read_metadata = registry_module.read_metadata
+
+    def read_metadata_while_serving(*args, **kwargs):
+        # Runs inside _load(), after the new model is built and before it is published
+        seen.append((registry.get(), registry.predictor(), registry.predict_records(RECORD)))
+        return read_metadata(*args, **kwargs)
+
+    monkeypatch.setattr(registry_module, 'read_metadata', read_metadata_while_serving)
+    rewrite_model(model_copy)
+    assert registry.check()
+
+    (model, predictor, prediction), = seen
+    assert isinstance(predictor, CompiledModel)
+    assert predictor is model or predictor.regressor is model.steps[-1][1]
+    assert prediction == pytest.approx(expected)
+    assert registry.version != old_version
+    assert registry.stats()['mmap'] is mmap
+    assert registry.predict_records(RECORD) == pytest.approx(expected)
+
+
+def test_unwritable_bundle_falls_back_to_pipeline(model_copy, monkeypatch):
+    def refuse(*args, **kwargs):
+        raise PermissionError(13, 'Permission denied')
+
+    monkeypatch.setattr('tempfile.mkdtemp', refuse)
+    registry = ModelRegistry(str(model_copy), poll_interval=None, mmap=True)
+    assert not isinstance(registry.get(), CompiledModel)
+    assert isinstance(registry.predictor(), CompiledModel)
+    assert registry.stats()['mmap'] is False
@@ -0,0 +1,66 @@
+"""Regression thresholds of benchmarks/run_suite.py."""
+import pytest
+
+import run_suite
+
+
+def stage(seconds, peak_bytes=1000):
+    return {'seconds': seconds, 'peak_bytes': peak_bytes}
+
+
+def test_sub_millisecond_stages_can_regress():
+    baseline = {
+        'predict_compiled_1': stage(0.00031),
+        'generate_recommendations': stage(0.0001),
+        'report_text': stage(0.000013),
+    }
+    results = {
+        'predict_compiled_1': stage(0.0045),
+        'generate_recommendations': stage(0.004),
+        'report_text': stage(0.003),
+    }
+    regressions = run_suite.compare(results, baseline, 1.5, 1.5)
+    assert [line.split(':')[0] for line in regressions] == list(results)
+
+
+def test_within_threshold_or_floor_passes():
+    baseline = {'dataframe_1000': stage(0.006), 'set_bg_cached': stage(0.0000002)}
+    results = {'dataframe_1000': stage(0.0085), 'set_bg_cached': stage(0.00005)}
+    assert run_suite.compare(results, baseline, 1.5, 1.5) == []
+
+
+def test_host_slowdown_is_capped():
+    calibration = run_suite.CALIBRATION_STAGE
+    baseline = {calibration: stage(0.007), 'model_load': stage(0.020)}
+    # The host ran 1.5x slower, but thresholds widen by at most MAX_HOST_SLOWDOWN
+    slow_host = {calibration: stage(0.0105), 'model_load': stage(0.040)}
+    assert run_suite.host_slowdown(slow_host, baseline) == run_suite.MAX_HOST_SLOWDOWN
+    assert [line.split(':')[0] for line in run_suite.compare(slow_host, baseline, 1.5, 1.5)] == ['model_load']
+    # Within 1.5x * 1.2 on a slower host
+    slow_host['model_load'] = stage(0.035)
+    assert run_suite.compare(slow_host, baseline, 1.5, 1.5) == []
+
+
+def test_faster_host_never_tightens():
+    calibration = run_suite.CALIBRATION_STAGE
+    baseline = {calibration: stage(0.007), 'model_load': stage(0.020)}
+    results = {calibration: stage(0.003), 'model_load': stage(0.029)}
+    assert run_suite.host_slowdown(results, baseline) == 1.0
+    assert run_suite.compare(results, baseline, 1.5, 1.5) == []
+
+
+def test_memory_regression():
+    baseline = {'explain_100': stage(1.0, peak_bytes=100_000_000)}
+    results = {'explain_100': stage(1.0, peak_bytes=200_000_000)}
+    assert run_suite.compare(results, baseline, 1.5, 1.5) == [
+        'explain_100: peak 200.00 MB vs baseline 100.00 MB',
+    ]
+
+
+def test_explain_ratios():
+    results = {
+        'predict_compiled_1': stage(0.0003),
+        'explain_1': stage(0.009),
+        'explain_100': stage(0.45),
+    }
+    assert run_suite.explain_ratios(results) == {'explain_1': pytest.approx(30.0)}